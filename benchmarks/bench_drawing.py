@@ -0,0 +1,85 @@
+"""Replay touch traces against DrawingCanvas and report the cost per move event.
+
+Usage:
+    python -m benchmarks.bench_drawing [trace.json ...]
+
+A trace is a JSON list of strokes, each a list of [x, y] touch positions.
+Without arguments a synthetic 4K-panel scribble is replayed. Each trace is
+run through the naive `Line.points +=` approach and through CanvasStroke.
+"""
+import json
+import math
+import os
+import sys
+import time
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+from kivy.graphics import Line, InstructionGroup  # noqa: E402
+
+from screens.client_screen.drawing_canvas import CanvasStroke  # noqa: E402
+
+
+def synthetic_trace(strokes=5, points=3000, size=(3840, 2160)):
+    """Return long looping scribbles sampled about every 2 px."""
+    width, height = size
+    trace = []
+    for s in range(strokes):
+        stroke = []
+        for i in range(points):
+            t = i * 0.004 + s
+            x = width / 2 + width * 0.35 * math.sin(3 * t) * math.cos(t)
+            y = height / 2 + height * 0.35 * math.sin(2 * t)
+            stroke.append([x, y])
+        trace.append(stroke)
+    return trace
+
+
+def replay_naive(trace):
+    """Append points the way the original DrawingCanvas did."""
+    timings = []
+    group = InstructionGroup()
+    for stroke in trace:
+        line = Line(points=stroke[0], width=5)
+        group.add(line)
+        for x, y in stroke[1:]:
+            started = time.perf_counter()
+            line.points += [x, y]
+            timings.append(time.perf_counter() - started)
+    return timings, sum(len(s) for s in trace)
+
+
+def replay_segmented(trace):
+    """Append points through CanvasStroke."""
+    timings = []
+    kept = 0
+    for stroke in trace:
+        canvas_stroke = CanvasStroke((1, 0, 0, 1), 5, *stroke[0])
+        for x, y in stroke[1:]:
+            started = time.perf_counter()
+            canvas_stroke.add_point(x, y)
+            timings.append(time.perf_counter() - started)
+        kept += len(canvas_stroke.points) // 2
+    return timings, kept
+
+
+def summarize(name, timings, kept):
+    timings = sorted(timings)
+    mean = sum(timings) / len(timings) * 1e6
+    p95 = timings[int(len(timings) * 0.95)] * 1e6
+    worst = timings[-1] * 1e6
+    print(f"{name:<12}{len(timings):>8}{kept:>8}{mean:>10.1f}{p95:>10.1f}{worst:>10.1f}")
+
+
+def main(paths):
+    traces = [(p, json.loads(open(p).read())) for p in paths] or [("synthetic", synthetic_trace())]
+    for label, trace in traces:
+        print(f"\nTrace: {label}")
+        print(f"{'mode':<12}{'events':>8}{'points':>8}{'mean us':>10}{'p95 us':>10}{'max us':>10}")
+        summarize("naive", *replay_naive(trace))
+        summarize("segmented", *replay_segmented(trace))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
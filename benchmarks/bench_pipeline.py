@@ -0,0 +1,474 @@
+"""Headless benchmarks for the capture -> save -> edit -> export pipeline.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--sizes 1080p,4k] [--repeat N]
+        [--trace trace.json ...] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.25]
+
+No display or camera is needed: frames come from the synthetic capture
+backend and Kivy runs in an SDL_VIDEODRIVER=offscreen window (SDL's dummy
+driver cannot create the GL window Kivy needs; add KIVY_GL_BACKEND=mock on
+machines without EGL). FMM_DATA_DIR points the gallery, caches and
+counter at a temporary directory, so nothing is written to the checkout.
+
+Most stages time the services the screens call. The edit screen itself is
+driven too: touch traces are replayed through the window into the real
+PhotoEditScreen and its DrawingCanvas, and its on_enter() and
+_save_photo() are timed with a synthetic capture. The camera screen is
+only covered through its services (capture, burst scoring, encoding),
+since it needs video playback. The drawing and screen stages need a GL
+window, so they run in a child process after the other results have been
+written; if that process fails (no window, shaders that do not compile,
+a native abort) they are listed under "skipped" in the results and left
+out of the comparison. Each stage reports the median, p95 and minimum of
+its runs in milliseconds. With --output the results are saved as JSON;
+with --baseline each median is compared to a previous results file and the
+exit status is 1 if any stage got slower by more than --threshold
+(a fraction, 0.25 = 25%), so the suite can gate a CI job.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+# Must be set before config is imported, which creates the gallery folders.
+# The child process running the window stages reuses its parent's directory.
+SCRATCH_DIR = os.environ.get("FMM_BENCH_SCRATCH") or tempfile.mkdtemp(prefix="fmm-bench-")
+os.environ.setdefault("FMM_DATA_DIR", SCRATCH_DIR)
+
+import cv2  # noqa: E402
+from kivy.base import EventLoop  # noqa: E402
+
+from config import ASSETS_DIR, BASE_DIR, PHOTOS_DIR, MirrorSettings  # noqa: E402
+from services.capture_backends import SyntheticBackend  # noqa: E402
+from services.camera_service import Frame  # noqa: E402
+from services.chroma_key import ChromaKeyer  # noqa: E402
+from services.compositor import EditDocument, Stroke, StickerPlacement, load_sticker, render  # noqa: E402
+from services.derivatives import make_derivatives  # noqa: E402
+from services.encoders import encode_frame, get_encoder  # noqa: E402
+from services.fileio import write_atomic  # noqa: E402
+from services.frame_selection import pick_best  # noqa: E402
+from services.id_allocator import IdAllocator  # noqa: E402
+from services.sticker_assets import StickerAtlas  # noqa: E402
+from services.capture_session import CaptureSession  # noqa: E402
+from services.photo_writer import photo_writer  # noqa: E402
+from services.derivatives import derivative_service  # noqa: E402
+from benchmarks.bench_drawing import replay_segmented, synthetic_trace  # noqa: E402
+
+SIZES = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+ENCODE_PRESETS = ["jpeg_fast", "jpeg_quality", "webp", "png_fast"]
+# Differences below this many milliseconds are treated as noise.
+NOISE_FLOOR_MS = 0.5
+
+# Modules main.py imports before the first screen is built.
+STARTUP_IMPORTS = (
+    "import config, services.camera_service, services.photo_writer, "
+    "services.gallery_index, services.derivatives, services.media_manager"
+)
+
+
+def stats(timings):
+    timings = sorted(timings)
+    return {
+        "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+        "runs": len(timings),
+    }
+
+
+def measure(fn, repeat, warmup=1):
+    """Run fn warmup + repeat times and return stats of the timed runs."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return stats(timings)
+
+
+def synthetic_frame(size):
+    width, height = size
+    capture = SyntheticBackend(fps=0).open(0, {"width": width, "height": height, "fourcc": "MJPG", "fps": 0})
+    return capture.read()[1]
+
+
+def edit_document(photo_path, size, stickers):
+    """A typical edit: a few long strokes and three stickers."""
+    width, height = size
+    strokes = [
+        Stroke((1, 0, 0, 1), 8 * width / 1920,
+               [v for i in range(400) for v in (width * (0.1 + 0.8 * i / 400), height * (0.3 + 0.1 * s + 0.05 * ((i % 40) / 40)))])
+        for s in range(5)
+    ]
+    placements = []
+    for i, path in enumerate(stickers[:3]):
+        x, y, side = width * (0.2 + 0.25 * i), height * 0.6, width * 0.15
+        placements.append(StickerPlacement(str(path), [[x, y], [x + side, y], [x, y + side]]))
+    return EditDocument(photo_path, strokes, placements)
+
+
+def bench_sizes(results, sizes, repeat, work_dir, stickers):
+    for label in sizes:
+        size = SIZES[label]
+        frame = synthetic_frame(size)
+        capture = SyntheticBackend(fps=0).open(0, {"width": size[0], "height": size[1], "fourcc": "MJPG", "fps": 0})
+        results[f"camera.read.{label}"] = measure(capture.read, repeat)
+
+        for preset in ENCODE_PRESETS:
+            encoder = get_encoder(preset)
+            results[f"capture.encode.{preset}.{label}"] = measure(lambda: encode_frame(frame, encoder, True), repeat)
+
+        burst = [Frame(i, time.monotonic(), capture.read()[1]) for i in range(MirrorSettings.burst_size)]
+        results[f"capture.burst_score.{label}"] = measure(
+            lambda: pick_best(burst, MirrorSettings.burst_blink_detection, MirrorSettings.burst_score_edge, budget=10.0),
+            repeat
+        )
+
+        encoder = get_encoder(MirrorSettings.output_preset)
+        photo_path = work_dir / f"photo_{label}{encoder.extension}"
+        results[f"capture.save.{label}"] = measure(
+            lambda: write_atomic(photo_path, encode_frame(frame, encoder, True)), repeat
+        )
+
+        document = edit_document(photo_path, size, stickers)
+        results[f"edit.render.{label}"] = measure(lambda: render(document, frame), repeat)
+        edited_path = work_dir / f"photo_{label}_edited{encoder.extension}"
+        results[f"edit.save.{label}"] = measure(
+            lambda: write_atomic(edited_path, encode_frame(render(document, frame), encoder)), repeat
+        )
+
+        derivatives_dir = work_dir / "derivatives"
+
+        def derivatives():
+            for name in MirrorSettings.derivative_sizes:
+                (derivatives_dir / name / f"{photo_path.stem}.jpg").unlink(missing_ok=True)
+            make_derivatives(photo_path, MirrorSettings.derivative_sizes, derivatives_dir)
+
+        results[f"export.derivatives.{label}"] = measure(derivatives, repeat)
+
+
+def bench_orientation(results, sizes, repeat):
+    """Vertical booths: rotating pixels up front versus orientation as metadata."""
+    encoder = get_encoder("jpeg_fast")
+    for label in sizes:
+        frame = synthetic_frame(SIZES[label])
+        document = EditDocument("", [], [])
+        results[f"orientation.rotate_encode.{label}"] = measure(lambda: encode_frame(frame, encoder, True), repeat)
+        results[f"orientation.exif_encode.{label}"] = measure(
+            lambda: encode_frame(frame, encoder, True, (encoder.extension,)), repeat
+        )
+        results[f"orientation.rotate_then_render.{label}"] = measure(
+            lambda: render(document, cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)), repeat
+        )
+        results[f"orientation.render_fused.{label}"] = measure(lambda: render(document, frame, True), repeat)
+
+
+def bench_chroma_key(results, sizes, repeat, work_dir):
+    """Green-screen replacement per preview frame, with a fresh and a reused mask."""
+    background_path = work_dir / "background.jpg"
+    cv2.imwrite(str(background_path), synthetic_frame((1600, 1200))[:, ::-1])
+    for label in sizes:
+        width, height = SIZES[label]
+        frame = synthetic_frame((width, height))
+        frame[:, : width // 3] = (40, 200, 40)
+        results[f"chroma_key.new_mask.{label}"] = measure(
+            lambda: ChromaKeyer().process(frame, str(background_path)), repeat
+        )
+        keyer = ChromaKeyer()
+        results[f"chroma_key.reused_mask.{label}"] = measure(lambda: keyer.process(frame, str(background_path)), repeat)
+
+
+def bench_ids(results, repeat, work_dir):
+    for name, block_size in (("ids.next_id", MirrorSettings.id_block_size), ("ids.next_id_unbuffered", 1)):
+        ids_dir = work_dir / name
+        ids_dir.mkdir()
+        allocator = IdAllocator(ids_dir / "counter.txt", ids_dir, block_size, MirrorSettings.photo_id_width)
+        results[name] = measure(allocator.next_id, repeat * 20)
+
+
+def bench_stickers(results, repeat, work_dir, stickers):
+    def cold_atlas():
+        atlas_dir = Path(tempfile.mkdtemp(dir=work_dir))
+        StickerAtlas(atlas_dir, MirrorSettings.sticker_thumb_size).ensure(stickers)
+
+    warm_dir = work_dir / "atlas"
+    StickerAtlas(warm_dir, MirrorSettings.sticker_thumb_size).ensure(stickers)
+
+    def load_all():
+        load_sticker.cache_clear()
+        for path in stickers:
+            load_sticker(str(path))
+
+    results["stickers.atlas_cold"] = measure(cold_atlas, max(1, repeat // 2), warmup=0)
+    results["stickers.atlas_warm"] = measure(
+        lambda: StickerAtlas(warm_dir, MirrorSettings.sticker_thumb_size).ensure(stickers), repeat
+    )
+    results["stickers.load_full_size"] = measure(load_all, repeat)
+
+
+def bench_drawing(results, repeat, traces):
+    for label, trace in traces:
+        timings = []
+        per_event = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            events, _ = replay_segmented(trace)
+            timings.append(time.perf_counter() - started)
+            per_event.extend(events)
+        result = stats(timings)
+        result["event_p95_us"] = round(sorted(per_event)[int(len(per_event) * 0.95)] * 1e6, 2)
+        results[f"drawing.replay.{label}"] = result
+
+
+def open_edit_screen():
+    """Build the real PhotoEditScreen in a ScreenManager on the headless window."""
+    from kivy.core.window import Window
+    from kivy.uix.screenmanager import Screen, ScreenManager, NoTransition
+    from screens.client_screen.photo_edit_screen import PhotoEditScreen
+
+    Window.size = SIZES["4k"]
+    manager = ScreenManager(transition=NoTransition())
+    manager.add_widget(Screen(name='start'))
+    screen = PhotoEditScreen(name='photo_edit')
+    manager.add_widget(screen)
+    Window.add_widget(manager)
+    return manager, screen
+
+
+def tick(frames=2):
+    from kivy.clock import Clock
+    for _ in range(frames):
+        Clock.tick()
+
+
+def show_capture(manager, screen, frame, photo_id=1):
+    """Hand frame to the edit screen the way the camera screen does."""
+    screen.photo_path = str(PHOTOS_DIR / f"photo_{photo_id:06d}.jpg")
+    screen.capture = CaptureSession(photo_id, screen.photo_path, frame, rotate_cw=True)
+    manager.current = 'photo_edit'
+    tick()
+
+
+def replay_touches(trace):
+    """Send a trace through the window as touch events; return per-move timings."""
+    from kivy.tests.common import UnitTestTouch
+
+    timings = []
+    for stroke in trace:
+        touch = UnitTestTouch(*stroke[0])
+        touch.touch_down()
+        for x, y in stroke[1:]:
+            started = time.perf_counter()
+            touch.touch_move(x, y)
+            timings.append(time.perf_counter() - started)
+        touch.touch_up()
+    return timings
+
+
+def bench_screens(results, sizes, repeat, traces):
+    """Drive the real edit screen: touch replay, on_enter and _save_photo."""
+    manager, screen = open_edit_screen()
+
+    frame = synthetic_frame(SIZES["1080p"])
+    for label, trace in traces:
+        show_capture(manager, screen, frame)
+        timings = []
+        per_event = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            per_event.extend(replay_touches(trace))
+            timings.append(time.perf_counter() - started)
+            screen.drawing_canvas.clear_all()
+        result = stats(timings)
+        result["event_p95_us"] = round(sorted(per_event)[int(len(per_event) * 0.95)] * 1e6, 2)
+        results[f"screens.edit.draw.{label}"] = result
+        screen._cleanup_and_return(0)
+        tick()
+
+    extension = get_encoder(MirrorSettings.output_preset).extension
+    for label in sizes:
+        frame = synthetic_frame(SIZES[label])
+        screen.capture = CaptureSession(1, str(PHOTOS_DIR / "photo_000001.jpg"), frame, rotate_cw=True)
+        results[f"screens.edit.enter.{label}"] = measure(screen.on_enter, repeat)
+
+        ui_timings = []
+        written_timings = []
+        for photo_id in range(1, repeat + 2):
+            show_capture(manager, screen, frame, photo_id)
+            replay_touches(synthetic_trace(strokes=2, points=300))
+            done = []
+            started = time.perf_counter()
+            screen._save_photo(0)
+            ui_timings.append(time.perf_counter() - started)
+            edited_path = PHOTOS_DIR / f"photo_{photo_id:06d}_edited{extension}"
+            photo_writer.when_done(edited_path, lambda path, error: done.append(time.perf_counter()))
+            while not done:
+                tick(1)
+                time.sleep(0.001)
+            written_timings.append(done[0] - started)
+            tick()
+        # The first save also loads stickers and warms the encoder.
+        results[f"screens.edit.save_ui.{label}"] = stats(ui_timings[1:])
+        results[f"screens.edit.save_written.{label}"] = stats(written_timings[1:])
+    photo_writer.flush()
+
+
+def bench_startup(results, repeat):
+    command = [sys.executable, "-c", STARTUP_IMPORTS]
+    results["startup.imports"] = measure(
+        lambda: subprocess.run(command, cwd=BASE_DIR, check=True), max(1, repeat // 2), warmup=1
+    )
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print each stage against the baseline; return the regressed names."""
+    regressions = []
+    print(f"\n{'stage':<40}{'baseline':>12}{'now':>12}{'change':>10}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<40}{'-':>12}{result['median_ms']:>12.2f}{'new':>10}")
+            continue
+        old, new = before["median_ms"], result["median_ms"]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold and new - old > NOISE_FLOOR_MS:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40}{old:>12.2f}{new:>12.2f}{change:>+10.0%}{flag}")
+    return regressions
+
+
+def gl_stages(traces, sizes, repeat, output):
+    """Run the stages that need a Kivy GL window and write their results to output.
+
+    Runs in a child process (see run_gl_stages), so a GL stack that cannot
+    compile shaders or aborts natively only loses these stages.
+    """
+    results = {}
+    try:
+        # Kivy graphics instructions need the GL context of a window, even off screen.
+        EventLoop.ensure_window()
+        if EventLoop.window is None:
+            print("No Kivy window could be created")
+            return 2
+        bench_drawing(results, repeat, traces)
+        bench_screens(results, sizes, repeat, traces)
+    finally:
+        derivative_service.shutdown(wait=True)
+    Path(output).write_text(json.dumps(results))
+    return 0
+
+
+def run_gl_stages(args, results, work_dir):
+    """Run gl_stages in a child process and merge its results; return why they were skipped, if so."""
+    output = work_dir / "gl_results.json"
+    command = [sys.executable, "-m", "benchmarks.bench_pipeline", "--sizes", args.sizes,
+               "--repeat", str(args.repeat), "--gl-output", str(output)]
+    for trace in args.trace:
+        command += ["--trace", str(Path(trace).resolve())]
+    # The child shares this run's scratch directory, which the parent removes.
+    env = dict(os.environ, FMM_BENCH_SCRATCH=SCRATCH_DIR)
+    returncode = subprocess.run(command, cwd=BASE_DIR, env=env).returncode
+    if returncode != 0 or not output.exists():
+        return f"the Kivy window stages exited with status {returncode}"
+    results.update(json.loads(output.read_text()))
+    return None
+
+
+def write_results(path, results, skipped):
+    meta = metadata()
+    if skipped:
+        meta["skipped"] = skipped
+    Path(path).write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless FreeMagicMirror pipeline benchmarks")
+    parser.add_argument("--sizes", default="1080p,4k", help="comma-separated: " + ",".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--trace", action="append", default=[], help="touch trace JSON to replay")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--gl-output", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    stickers = sorted((ASSETS_DIR / "stickers").glob("*.png"))
+    traces = [(Path(p).stem, json.loads(Path(p).read_text())) for p in args.trace] or [
+        ("synthetic", synthetic_trace())
+    ]
+    if args.gl_output:
+        return gl_stages(traces, sizes, args.repeat, args.gl_output)
+
+    results = {}
+    skipped = None
+    started = time.perf_counter()
+    work_dir = Path(tempfile.mkdtemp(dir=SCRATCH_DIR))
+    try:
+        bench_startup(results, args.repeat)
+        bench_sizes(results, sizes, args.repeat, work_dir, stickers)
+        bench_orientation(results, sizes, args.repeat)
+        bench_chroma_key(results, sizes, args.repeat, work_dir)
+        bench_ids(results, args.repeat, work_dir)
+        if stickers:
+            bench_stickers(results, args.repeat, work_dir, stickers)
+        # Saved before the window stages, so CI keeps these results whatever happens to GL.
+        if args.output:
+            write_results(args.output, results, ["drawing", "screens"])
+        skipped = run_gl_stages(args, results, work_dir)
+    finally:
+        derivative_service.shutdown(wait=True)
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+    print(f"{'stage':<40}{'median ms':>12}{'p95 ms':>12}{'runs':>8}")
+    for name, result in results.items():
+        print(f"{name:<40}{result['median_ms']:>12.2f}{result['p95_ms']:>12.2f}{result['runs']:>8}")
+    if skipped:
+        print(f"\nDrawing and screen stages skipped: {skipped}")
+    print(f"\nTotal benchmark time: {time.perf_counter() - started:.1f}s")
+
+    if args.output:
+        write_results(args.output, results, ["drawing", "screens"] if skipped else None)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
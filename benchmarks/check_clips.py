@@ -0,0 +1,89 @@
+"""Check that every clip format actually finishes through ffmpeg.
+
+Usage:
+    python -m benchmarks.check_clips [--seconds 3] [--fps 15] [--edge 720] [--ffmpeg ffmpeg]
+
+Synthetic camera frames are streamed through FfmpegClipWriter for every
+format in CLIP_FORMATS, as plain clips and as boomerangs, into a temporary
+directory. Each file must be finished, non-empty and report the expected
+number of frames written. The time from the last frame to the finished
+file and, on POSIX, the peak memory of the ffmpeg processes are printed;
+run with a larger --seconds to see that the encoder memory stays flat.
+The exit status is 1 if any clip fails.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from services.capture_backends import SyntheticBackend  # noqa: E402
+from services.clip_recorder import CLIP_FORMATS, FfmpegClipWriter, clip_frame  # noqa: E402
+
+
+def child_peak_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Finish a short clip in every format")
+    parser.add_argument("--seconds", type=float, default=3.0, help="clip length")
+    parser.add_argument("--fps", type=int, default=15, help="clip frame rate")
+    parser.add_argument("--edge", type=int, default=720, help="longest clip side")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="ffmpeg executable")
+    args = parser.parse_args(argv)
+
+    ffmpeg = shutil.which(args.ffmpeg)
+    if ffmpeg is None:
+        print(f"{args.ffmpeg} not found")
+        return 1
+
+    capture = SyntheticBackend(fps=0).open(0, {"width": 1920, "height": 1080, "fourcc": "MJPG", "fps": 0})
+    frames = max(3, round(args.seconds * args.fps))
+    failures = []
+    print(f"{'format':<8}{'boomerang':<11}{'frames':>8}{'kB':>10}{'finish s':>10}{'ffmpeg MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for clip_format in CLIP_FORMATS:
+            for boomerang in (False, True):
+                path = Path(tmp) / f"clip_{boomerang:d}.{clip_format}"
+                writer = FfmpegClipWriter(path, clip_format, args.fps, boomerang, ffmpeg)
+                try:
+                    for _ in range(frames):
+                        writer.write(clip_frame(capture.read()[1], args.edge, rotate_cw=True))
+                    started = time.monotonic()
+                    writer.close(timeout=60)
+                    finish = time.monotonic() - started
+                except Exception as e:
+                    writer.abort()
+                    failures.append(f"{clip_format}{' boomerang' if boomerang else ''}: {e}")
+                    continue
+                size = path.stat().st_size if path.exists() else 0
+                if not size:
+                    failures.append(f"{clip_format}{' boomerang' if boomerang else ''}: empty file")
+                peak = child_peak_mb()
+                print(
+                    f"{clip_format:<8}{'yes' if boomerang else 'no':<11}{writer.frames:>8}{size / 1024:>10.0f}"
+                    f"{finish:>10.2f}{'-' if peak is None else f'{peak:.0f}':>11}"
+                )
+
+    if failures:
+        print("\nFailed clips:\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
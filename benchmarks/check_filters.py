@@ -0,0 +1,110 @@
+"""Check that the GPU filter shader and the CPU filter renderer agree.
+
+Usage:
+    python -m benchmarks.check_filters [--tolerance 2] [--gl]
+
+Every filter in services.filters is applied to a synthetic camera frame and
+a full sweep of colours with the cv2 path used for saved photos and
+compared, channel by channel, with a floating-point emulation of
+FILTER_FS. With --gl the frame is also drawn through the real shader into
+an Fbo and read back; that needs a working OpenGL context, so it is off by
+default for headless CI. Also reports the CPU cost per filter at 1080p and
+4K. The exit status is 1 if any difference exceeds --tolerance.
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import numpy as np  # noqa: E402
+
+from services.capture_backends import SyntheticBackend  # noqa: E402
+from services.filters import FILTERS, apply_filter, shader_reference  # noqa: E402
+
+SIZES = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+
+
+def synthetic_frame(width, height):
+    capture = SyntheticBackend(fps=0).open(0, {"width": width, "height": height, "fourcc": "MJPG", "fps": 0})
+    return capture.read()[1]
+
+
+def colour_sweep():
+    """Every colour on a 4-step grid (64^3 colours) as a 512x512 BGR image."""
+    values = np.arange(0, 256, 4, dtype=np.uint8)
+    b, g, r = np.meshgrid(values, values, values, indexing="ij")
+    return np.stack([b, g, r], axis=-1).reshape(512, 512, 3)
+
+
+def render_gl(image, lut_filter):
+    """Draw image through the filter shader into an Fbo and return BGR pixels."""
+    from kivy.base import EventLoop
+    from kivy.graphics import Fbo, Color, Rectangle, ClearColor, ClearBuffers
+    from kivy.graphics.texture import Texture
+    from screens.client_screen.filter_shader import ShaderFilter
+
+    EventLoop.ensure_window()
+    height, width = image.shape[:2]
+    texture = Texture.create(size=(width, height), colorfmt='bgr')
+    texture.blit_buffer(np.ascontiguousarray(image).reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+
+    shader_filter = ShaderFilter()
+    shader_filter.set_filter(lut_filter)
+    fbo = Fbo(size=(width, height))
+    with fbo:
+        ClearColor(0, 0, 0, 1)
+        ClearBuffers()
+    fbo.add(shader_filter.context)
+    with shader_filter.context:
+        Color(1, 1, 1, 1)
+        Rectangle(texture=texture, pos=(0, 0), size=(width, height))
+    fbo.draw()
+    # Row 0 of the upload is drawn at the bottom, which glReadPixels returns first.
+    rgba = np.frombuffer(fbo.pixels, dtype=np.uint8).reshape(height, width, 4)
+    return np.ascontiguousarray(rgba[:, :, 2::-1])
+
+
+def max_difference(a, b):
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GPU/CPU filter agreement check")
+    parser.add_argument("--tolerance", type=int, default=2, help="largest allowed difference per channel")
+    parser.add_argument("--gl", action="store_true", help="also render through OpenGL")
+    args = parser.parse_args(argv)
+
+    images = {"frame": synthetic_frame(640, 360), "sweep": colour_sweep()}
+    failures = []
+    print(f"{'filter':<10}{'image':<8}{'shader':>8}{'gl':>6}")
+    for name, lut_filter in FILTERS.items():
+        for label, image in images.items():
+            cpu = apply_filter(image, lut_filter)
+            diff = max_difference(cpu, shader_reference(image, lut_filter))
+            gl_diff = max_difference(cpu, render_gl(image, lut_filter)) if args.gl else None
+            worst = max(diff, gl_diff or 0)
+            if worst > args.tolerance:
+                failures.append(f"{name}/{label}")
+            print(f"{name:<10}{label:<8}{diff:>8}{'-' if gl_diff is None else gl_diff:>6}")
+
+    print(f"\n{'filter':<10}" + "".join(f"{label + ' ms':>12}" for label in SIZES))
+    frames = {label: synthetic_frame(*size) for label, size in SIZES.items()}
+    for name, lut_filter in FILTERS.items():
+        row = f"{name:<10}"
+        for label, frame in frames.items():
+            started = time.perf_counter()
+            apply_filter(frame, lut_filter)
+            row += f"{(time.perf_counter() - started) * 1000:>12.1f}"
+        print(row)
+
+    if failures:
+        print(f"\nFilters differing by more than {args.tolerance}: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
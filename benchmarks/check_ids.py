@@ -0,0 +1,56 @@
+"""Check that a lost or corrupt counter never hands out an ID already in the gallery.
+
+Usage:
+    python -m benchmarks.check_ids
+
+Galleries holding only photos, only clips, and both are built in a
+temporary directory. For each one the counter file is removed and then
+replaced with garbage, and the next ID must be above every photo_NNNNNN
+and clip_NNNNNN file present. The exit status is 1 if any case fails.
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+from services.id_allocator import IdAllocator
+
+GALLERIES = {
+    "photos": ["photo_000004.jpg", "masters/photo_000007.png", "edits/photo_000004.json"],
+    "clips": ["clips/clip_000003.mp4", "clips/clip_000012.gif"],
+    "mixed": ["photo_000009_edited.jpg", "clips/clip_000015.webp", "masters/photo_000002.png"],
+}
+COUNTERS = {"missing": None, "corrupt": b"\x00garbage"}
+
+
+def build_gallery(root, files):
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for gallery, files in GALLERIES.items():
+            highest = max(int(Path(name).stem.split("_")[1]) for name in files)
+            for counter, content in COUNTERS.items():
+                root = Path(tmp) / f"{gallery}_{counter}"
+                build_gallery(root, files)
+                counter_file = root / "counter.txt"
+                if content is not None:
+                    counter_file.write_bytes(content)
+                next_id = int(IdAllocator(counter_file, root).next_id())
+                ok = next_id > highest
+                print(f"{gallery:<8}{counter:<9}highest {highest:>3}  next {next_id:>3}  {'ok' if ok else 'FAIL'}")
+                if not ok:
+                    failures.append(f"{gallery} gallery, {counter} counter: next ID {next_id} <= {highest}")
+
+    if failures:
+        print("\nReused IDs:\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Soak test: run thousands of synthetic guest sessions and watch memory.
+
+Usage:
+    python -m benchmarks.soak_sessions [--sessions 2000] [--size 1080p]
+        [--sample 50] [--max-growth-mb 32] [--output soak.json]
+
+Each session drives the real PhotoEditScreen the way a guest does: a
+synthetic camera frame is handed over as a CaptureSession, a few strokes
+and stickers are added, the edit is rendered and encoded in memory and
+the screen is cleaned up again. Kivy runs headless (SDL_VIDEODRIVER=offscreen,
+KIVY_GL_BACKEND=mock), so no display or camera is needed, and FMM_DATA_DIR
+points the gallery and caches at a temporary directory, so nothing is
+written to the photo folder.
+
+Every --sample sessions the process RSS and the occupancy of every cache
+registered with the memory monitor are recorded. The first half of the
+run is treated as warm-up; if RSS grew by more than --max-growth-mb over
+the second half the exit status is 1, so a leak fails the run.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("KIVY_GL_BACKEND", "mock")
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+# Must be set before config is imported, which creates the gallery folders.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="fmm-soak-")
+os.environ.setdefault("FMM_DATA_DIR", SCRATCH_DIR)
+
+from kivy.base import EventLoop  # noqa: E402
+from kivy.clock import Clock  # noqa: E402
+from kivy.uix.screenmanager import Screen, ScreenManager, NoTransition  # noqa: E402
+
+from config import MirrorSettings  # noqa: E402
+from services.capture_backends import SyntheticBackend  # noqa: E402
+from services.capture_session import CaptureSession  # noqa: E402
+from services.compositor import render  # noqa: E402
+from services.encoders import get_encoder  # noqa: E402
+from services.memory_monitor import memory_monitor, rss_bytes, limit_kivy_caches, KivyCacheOccupancy  # noqa: E402
+from services.sticker_assets import sticker_textures  # noqa: E402
+from screens.client_screen.photo_edit_screen import PhotoEditScreen  # noqa: E402
+
+SIZES = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+
+
+def tick(frames=2):
+    for _ in range(frames):
+        Clock.tick()
+
+
+def draw(canvas, session, strokes=3, points=300):
+    """Scribble a few strokes that differ slightly per session."""
+    width, height = canvas.size
+    for s in range(strokes):
+        stroke = None
+        for i in range(points):
+            t = i * 0.02 + s + session * 0.1
+            x = width / 2 + width * 0.4 * math.sin(3 * t)
+            y = height / 2 + height * 0.4 * math.sin(2 * t)
+            if stroke is None:
+                stroke = canvas.begin_stroke(x, y)
+            else:
+                stroke.add_point(x, y)
+
+
+def run_session(manager, screen, camera, session, encoder):
+    """One guest: capture, edit, render, encode, clean up. Returns encoded bytes."""
+    frame = camera.read()[1]
+    screen.photo_path = f"soak/photo_{session:06d}{encoder.extension}"
+    screen.capture = CaptureSession(
+        session, screen.photo_path, frame, rotate_cw=MirrorSettings.orientation == "vertical"
+    )
+    manager.current = 'photo_edit'
+    tick()
+
+    draw(screen.drawing_canvas, session)
+    for path in screen.available_stickers[session % 4:][:3]:
+        screen.add_sticker_from_tray(path)
+
+    document = screen.build_edit_document()
+    size = len(encoder.encode(render(document, screen.capture.image, screen.capture.rotate_cw)).data)
+
+    screen._cleanup_and_return(0)
+    tick()
+    return size
+
+
+def sample(session, started):
+    gc.collect()
+    snapshot = memory_monitor.snapshot()
+    snapshot["session"] = session
+    snapshot["seconds"] = round(time.perf_counter() - started, 1)
+    return snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless FreeMagicMirror memory soak test")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--size", default="1080p", choices=list(SIZES))
+    parser.add_argument("--sample", type=int, default=50, help="sessions between memory samples")
+    parser.add_argument("--max-growth-mb", type=float, default=32.0)
+    parser.add_argument("--output", help="write the samples as JSON")
+    args = parser.parse_args(argv)
+
+    EventLoop.ensure_window()
+    limit_kivy_caches(MirrorSettings.kivy_image_cache_limit, MirrorSettings.kivy_texture_cache_limit)
+    memory_monitor.register("kivy images", KivyCacheOccupancy('kv.image'))
+    memory_monitor.register("kivy textures", KivyCacheOccupancy('kv.texture'))
+    memory_monitor.register("sticker textures", sticker_textures, sticker_textures.max_bytes)
+
+    manager = ScreenManager(transition=NoTransition())
+    manager.add_widget(Screen(name='start'))
+    screen = PhotoEditScreen(name='photo_edit')
+    manager.add_widget(screen)
+    tick()
+
+    width, height = SIZES[args.size]
+    camera = SyntheticBackend(fps=0).open(0, {"width": width, "height": height, "fourcc": "MJPG", "fps": 0})
+    encoder = get_encoder(MirrorSettings.output_preset)
+
+    started = time.perf_counter()
+    samples = [sample(0, started)]
+    print(f"{'session':>8}{'seconds':>9}{'rss MB':>9}  caches (entries/MB)")
+    for session in range(1, args.sessions + 1):
+        run_session(manager, screen, camera, session, encoder)
+        if session % args.sample == 0 or session == args.sessions:
+            snapshot = sample(session, started)
+            samples.append(snapshot)
+            caches = "  ".join(
+                f"{name} {cache['entries']}/{cache['bytes'] / 2**20:.0f}" for name, cache in snapshot["caches"].items()
+            )
+            print(f"{session:>8}{snapshot['seconds']:>9}{snapshot['rss'] / 2**20:>9.0f}  {caches}")
+
+    steady = samples[len(samples) // 2:]
+    growth_mb = (steady[-1]["rss"] - steady[0]["rss"]) / 2**20
+    per_session_kb = growth_mb * 1024 / max(1, steady[-1]["session"] - steady[0]["session"])
+    print(f"\nRSS growth over the second half: {growth_mb:+.1f} MB ({per_session_kb:+.2f} KB per session)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"samples": samples, "growth_mb": growth_mb}, indent=2))
+        print(f"Samples written to {args.output}")
+
+    if rss_bytes() == 0:
+        print("RSS is not available on this platform; growth was not checked")
+        return 0
+    if growth_mb > args.max_growth_mb:
+        print(f"Memory grew by more than {args.max_growth_mb} MB")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
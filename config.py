@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -7,28 +8,54 @@ if getattr(sys, "frozen", False):
 else:
     BASE_DIR = Path(__file__).parent.resolve()
 
+# Photos, caches and counters; benchmarks point FMM_DATA_DIR at a scratch folder.
+DATA_DIR = Path(os.environ.get("FMM_DATA_DIR", BASE_DIR))
+
 ASSETS_DIR = BASE_DIR / "assets"
 VIDEOS_DIR = ASSETS_DIR / "videos"
-PHOTOS_DIR = BASE_DIR / "gallery"
-COUNTER_FILE = BASE_DIR / "counter.txt"
-
-PHOTOS_DIR.mkdir(exist_ok=True)
+BACKGROUNDS_DIR = ASSETS_DIR / "backgrounds"
+MODELS_DIR = ASSETS_DIR / "models"
+PHOTOS_DIR = DATA_DIR / "gallery"
+MASTERS_DIR = PHOTOS_DIR / "masters"
+CLIPS_DIR = PHOTOS_DIR / "clips"
+EDITS_DIR = PHOTOS_DIR / "edits"
+DERIVATIVES_DIR = PHOTOS_DIR / "derivatives"
+COUNTER_FILE = DATA_DIR / "counter.txt"
+CACHE_DIR = DATA_DIR / "cache"
+GALLERY_DB = CACHE_DIR / "gallery.db"
+CAMERA_CACHE_FILE = CACHE_DIR / "cameras.json"
+KIOSK_CONFIG_FILE = DATA_DIR / "kiosk.json"
+TRACES_DIR = CACHE_DIR / "traces"
+METRICS_DIR = CACHE_DIR / "metrics"
+
+PHOTOS_DIR.mkdir(parents=True, exist_ok=True)
+MASTERS_DIR.mkdir(exist_ok=True)
+EDITS_DIR.mkdir(exist_ok=True)
 VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def initialize_counter():
-    """Create counter.txt if missing, starting from 0."""
-    if not COUNTER_FILE.exists():
-        COUNTER_FILE.write_text("0")
+_id_allocator = None
+
+
+def get_id_allocator():
+    """Return the shared photo ID allocator, creating it on first use."""
+    global _id_allocator
+    if _id_allocator is None:
+        from services.id_allocator import IdAllocator
+
+        counter_file = PHOTOS_DIR / "counter.txt" if MirrorSettings.counter_in_gallery else COUNTER_FILE
+        _id_allocator = IdAllocator(
+            counter_file,
+            PHOTOS_DIR,
+            block_size=MirrorSettings.id_block_size,
+            width=MirrorSettings.photo_id_width
+        )
+    return _id_allocator
 
 
 def get_next_id():
-    """Return the next photo ID (e.g., '001') and update the counter."""
-    initialize_counter()
-    current = int(COUNTER_FILE.read_text().strip())
-    current += 1
-    COUNTER_FILE.write_text(str(current))
-    return f"{current:03d}"
+    """Return the next photo ID (e.g., '000001')."""
+    return get_id_allocator().next_id()
 
 
 class MirrorSettings:
@@ -38,7 +65,83 @@ class MirrorSettings:
     available_cameras = []
     selected_screen = 0
     orientation = "vertical"
-
+    prewarm_screens = True
+    kiosk_autostart = False
+
+    camera_mode = None
+    capture_backend = "auto"
+    capture_file = ""
+    capture_buffer_size = 1
+    camera_open_timeout = 3.0
+    camera_idle_timeout = 0
+    frame_buffer_size = 8
+    live_preview = True
+    mirror_preview = True
+    pose_video_opacity = 0.6
+    camera_filter = "none"
+    chroma_key = False
+    chroma_background = ""
+    chroma_hue = (35, 85)
+    chroma_min_saturation = 60
+    chroma_min_value = 40
+    chroma_feather = 3
+    chroma_mask_edge = 320
+    chroma_motion_threshold = 2.0
+    chroma_mask_max_reuse = 15
+    pose_video_loops = 3
+    countdown_seconds = 5
+    hands_free = False
+    face_model = "face_detection_yunet_2023mar.onnx"
+    face_detect_edge = 320
+    face_detect_fps = 5
+    face_detect_duty = 0.25
+    face_lost_grace = 0.5
+    face_dwell_seconds = 1.5
+    face_rearm_seconds = 10
+    face_center_margin = 0.25
+    face_centered_countdown = 2
+    auto_framing = False
+    auto_framing_padding = 0.6
+    auto_framing_min_scale = 0.6
+    hidden_video_policy = "pause"
+    video_frame_cache = False
+    video_frame_cache_mb = 256
+    video_frame_cache_edge = 960
+    show_debug_overlay = False
+    metrics_enabled = True
+    metrics_log_max_mb = 5
+    metrics_log_backups = 5
+    show_metrics_overlay = False
+    burst_size = 6
+    burst_window = 0.2
+    burst_score_budget = 0.15
+    burst_score_edge = 480
+    burst_blink_detection = True
+    capture_mode = "photo"
+    clip_format = "mp4"
+    clip_seconds = 3.0
+    clip_fps = 15
+    clip_max_edge = 720
+    clip_finish_timeout = 5.0
+    ffmpeg_path = "ffmpeg"
+    writer_queue_size = 8
+    output_preset = "jpeg_fast"
+    exif_orientation_formats = (".jpg",)
+    master_preset = None
+    sticker_thumb_size = 128
+    record_touch_traces = False
+    sticker_cache_mb = 64
+    photo_texture_max_edge = 1920
+    kivy_image_cache_limit = 32
+    kivy_texture_cache_limit = 64
+    memory_report_interval = 600
+    id_block_size = 10
+    photo_id_width = 6
+    counter_in_gallery = False
+    derivative_sizes = {"thumb": 256, "preview": 1024}
+    derivatives_backfill_on_start = True
+
+    CAMERA_SIZE = (1920, 1080)
     HORIZONTAL_SIZE = (1920, 1080)
     VERTICAL_SIZE = (1080, 1920)
     ADMIN_SIZE = (800, 600)
@@ -51,8 +154,6 @@ class MirrorSettings:
         return cls.HORIZONTAL_SIZE
 
 
-initialize_counter()
-
 START_VIDEO_PATH = str(VIDEOS_DIR / "start_loop.mp4")
 POSE_VIDEO_PATH = str(VIDEOS_DIR / "pose_prompt.mp4")
 
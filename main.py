@@ -1,42 +1,169 @@
+import multiprocessing
+import threading
+from services.startup_trace import startup_trace
 from kivy.app import App
-from kivy.uix.screenmanager import ScreenManager
+from kivy.clock import Clock
 from kivy.core.window import Window
 
-from screens.admin_screen.admin_screen import AdminScreen
-from screens.client_screen.start_screen import StartScreen
-from screens.client_screen.camera_screen import CameraScreen
-from screens.client_screen.photo_edit_screen import PhotoEditScreen
+from config import MirrorSettings
+from screens.lazy_screen_manager import LazyScreenManager
+from services.camera_service import camera_service
+from services.photo_writer import photo_writer
+from services.gallery_index import gallery_index
+from services.derivatives import derivative_service
+from services.media_manager import media_manager
+from services.session_metrics import session_metrics
+from services.memory_monitor import memory_monitor, limit_kivy_caches, KivyCacheOccupancy
+from services.kiosk_config import kiosk_config
+
+startup_trace.mark("imports")
+
+
+def build_admin_screen():
+    from screens.admin_screen.admin_screen import AdminScreen
+    return AdminScreen(name='admin')
+
+
+def build_start_screen():
+    from screens.client_screen.start_screen import StartScreen
+    return StartScreen(name='start')
+
+
+def build_camera_screen():
+    from screens.client_screen.camera_screen import CameraScreen
+    return CameraScreen(name='camera')
+
+
+def build_photo_edit_screen():
+    from screens.client_screen.photo_edit_screen import PhotoEditScreen
+    return PhotoEditScreen(name='photo_edit')
 
 
 class FreeMagicMirrorApp(App):
     """Main application class for the FreeMagicMirror"""
 
     def build(self):
-        """Initialize and configure the screen manager."""
+        """Initialize and configure the screen manager.
+
+        Only the first screen is built here; the others are built the first
+        time they are shown, or prewarmed once it is up. That is the admin
+        screen, unless kiosk auto-start is on and the saved setup still
+        matches the hardware, in which case the mirror starts right away.
+        """
         Window.bind(on_keyboard=self.on_keyboard)
+        saved_camera = kiosk_config.load()
+        startup_trace.mark("kiosk config")
 
-        sm = ScreenManager()
+        sm = LazyScreenManager()
+        sm.register('admin', build_admin_screen)
+        sm.register('start', build_start_screen)
+        sm.register('camera', build_camera_screen)
+        sm.register('photo_edit', build_photo_edit_screen)
+        sm.bind(current=lambda manager, name: media_manager.on_screen_changed(name))
 
-        admin = AdminScreen(name='admin')
-        start = StartScreen(name='start')
-        camera = CameraScreen(name='camera')
-        photo_edit = PhotoEditScreen(name='photo_edit')
+        self.kiosk_started = saved_camera is not None and self._kiosk_start(sm, saved_camera)
+        if not self.kiosk_started:
+            sm.current = 'admin'
+            startup_trace.mark("admin screen")
+        return sm
 
-        sm.add_widget(admin)
-        sm.add_widget(start)
-        sm.add_widget(camera)
-        sm.add_widget(photo_edit)
+    def _kiosk_start(self, sm, saved_camera):
+        """Skip the admin screen with the saved setup; return False if it cannot be used."""
+        if not MirrorSettings.kiosk_autostart:
+            return False
+        from screens.mirror_window import monitor_count, open_mirror_window
+        from services.camera_discovery import camera_discovery, device_identity
 
-        sm.current = 'admin'
-        return sm
+        problems = kiosk_config.validate(saved_camera, camera_discovery.cached(), monitor_count(), device_identity)
+        if problems:
+            print(f"Kiosk auto-start skipped: {'; '.join(problems)}")
+            return False
+
+        # The camera opens on its own thread while the window and start screen come up.
+        camera_service.start(MirrorSettings.selected_camera)
+        open_mirror_window(MirrorSettings.selected_screen)
+        sm.current = 'start'
+        startup_trace.mark("kiosk start screen")
+        print(f"Kiosk auto-start with camera {MirrorSettings.selected_camera}")
+        return True
+
+    def on_start(self):
+        """Bring the gallery index and derivatives up to date in the background."""
+        startup_trace.mark("window")
+        Clock.schedule_once(self._on_first_frame, 0)
+        if MirrorSettings.metrics_enabled:
+            session_metrics.install()
+            Clock.schedule_interval(session_metrics.frame, 0)
+        self._start_memory_monitor()
+        self.metrics_overlay = None
+        if MirrorSettings.show_metrics_overlay:
+            self.toggle_metrics_overlay()
+        threading.Thread(target=self._catch_up_gallery, name="gallery-catch-up", daemon=True).start()
+
+    def _start_memory_monitor(self):
+        """Cap Kivy's caches and report cache occupancy periodically."""
+        from services.sticker_assets import sticker_textures
+        limit_kivy_caches(MirrorSettings.kivy_image_cache_limit, MirrorSettings.kivy_texture_cache_limit)
+        memory_monitor.register("kivy images", KivyCacheOccupancy('kv.image'))
+        memory_monitor.register("kivy textures", KivyCacheOccupancy('kv.texture'))
+        memory_monitor.register("sticker textures", sticker_textures, sticker_textures.max_bytes)
+        memory_monitor.register("camera frames", camera_service.frames)
+        if MirrorSettings.memory_report_interval:
+            Clock.schedule_interval(memory_monitor.report, MirrorSettings.memory_report_interval)
+
+    def _on_first_frame(self, dt):
+        """Report the startup trace and prewarm the remaining screens."""
+        startup_trace.mark("first frame")
+        startup_trace.report()
+        if self.kiosk_started:
+            # Guests may walk up at once: build the camera screen (and preload its
+            # videos) on the next frames instead of waiting for idle time. The
+            # admin screen is left for later, its camera probe would compete
+            # with the running camera.
+            self.root.prewarm(delay=0, names=('camera', 'photo_edit'))
+        elif MirrorSettings.prewarm_screens:
+            self.root.prewarm()
+
+    def _catch_up_gallery(self):
+        """Reconcile the index and resume any unfinished derivatives."""
+        gallery_index.reconcile()
+        if MirrorSettings.derivatives_backfill_on_start:
+            derivative_service.backfill()
+
+    def on_stop(self):
+        """Close the camera and flush pending photos when the app exits."""
+        camera_service.stop()
+        photo_writer.flush()
+        gallery_index.close()
+        derivative_service.shutdown()
+        media_manager.cpu_report()
+        memory_monitor.report()
+        if MirrorSettings.metrics_enabled:
+            session_metrics.write_prometheus()
+
+    def toggle_metrics_overlay(self):
+        """Show or hide the stage latency overlay on top of every screen."""
+        from screens.metrics_overlay import MetricsOverlay
+        if self.metrics_overlay is None:
+            self.metrics_overlay = MetricsOverlay()
+            Window.add_widget(self.metrics_overlay)
+            self.metrics_overlay.start()
+        else:
+            self.metrics_overlay.stop()
+            Window.remove_widget(self.metrics_overlay)
+            self.metrics_overlay = None
 
     def on_keyboard(self, window, key, *args):
-        """Close the app when the ESC key is pressed."""
+        """Close the app on ESC; F2 toggles the metrics overlay."""
         if key == 27:
             self.stop()
             return True
+        if key == 283:
+            self.toggle_metrics_overlay()
+            return True
         return False
 
 
 if __name__ == '__main__':
-    FreeMagicMirrorApp().run()
\ No newline at end of file
+    multiprocessing.freeze_support()
+    FreeMagicMirrorApp().run()
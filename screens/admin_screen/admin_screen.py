@@ -1,14 +1,32 @@
-import cv2
 from kivy.uix.screenmanager import Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.spinner import Spinner
 from kivy.core.window import Window
+from kivy.clock import Clock
 from kivy.graphics import Color, Rectangle
-from screeninfo import get_monitors
 
 from config import MirrorSettings, PHOTOS_DIR
+from services.camera_service import camera_service
+from services.camera_discovery import camera_discovery, best_mode, mode_label
+from services.kiosk_config import kiosk_config
+from screens.mirror_window import monitor_count, open_mirror_window
+
+# Output spinner label -> (MirrorSettings.capture_mode, MirrorSettings.clip_format)
+OUTPUT_MODES = {
+    'Output: Photo': ("photo", "mp4"),
+    'Output: Clip (MP4)': ("clip", "mp4"),
+    'Output: Clip (GIF)': ("clip", "gif"),
+    'Output: Clip (WebP)': ("clip", "webp"),
+    'Output: Boomerang (MP4)': ("boomerang", "mp4"),
+    'Output: Boomerang (GIF)': ("boomerang", "gif"),
+}
+
+KIOSK_MODES = {
+    'Kiosk auto-start: Off': False,
+    'Kiosk auto-start: On': True,
+}
 
 
 class AdminScreen(Screen):
@@ -17,7 +35,8 @@ class AdminScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        Window.size = MirrorSettings.ADMIN_SIZE
+        # Mode restored from the kiosk config, kept until another camera is picked.
+        self.restored_mode = MirrorSettings.camera_mode
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
 
@@ -42,21 +61,25 @@ class AdminScreen(Screen):
         )
         layout.add_widget(camera_label)
 
-        self.detect_cameras()
-
-        camera_options = [f"Camera {i}" for i in MirrorSettings.available_cameras]
-        if not camera_options:
-            camera_options = ["No cameras detected"]
-
+        self.cameras = {}
         self.camera_spinner = Spinner(
-            text=f"Camera {MirrorSettings.selected_camera}",
-            values=camera_options,
+            text='Detecting cameras...',
+            values=[],
             size_hint=(1, 0.08),
             font_size='18sp'
         )
         self.camera_spinner.bind(text=self.on_camera_selected)
         layout.add_widget(self.camera_spinner)
 
+        self.mode_spinner = Spinner(
+            text='Camera mode: Auto',
+            values=[],
+            size_hint=(1, 0.08),
+            font_size='18sp'
+        )
+        self.mode_spinner.bind(text=self.on_mode_selected)
+        layout.add_widget(self.mode_spinner)
+
         orientation_label = Label(
             text='MagicMirror screen orientation',
             font_size='20sp',
@@ -66,7 +89,7 @@ class AdminScreen(Screen):
         layout.add_widget(orientation_label)
 
         self.orientation_spinner = Spinner(
-            text='Vertical',
+            text=MirrorSettings.orientation.capitalize(),
             values=['Vertical', 'Horizontal'],
             size_hint=(1, 0.08),
             font_size='18sp'
@@ -74,6 +97,16 @@ class AdminScreen(Screen):
         self.orientation_spinner.bind(text=self.on_orientation_selected)
         layout.add_widget(self.orientation_spinner)
 
+        output = (MirrorSettings.capture_mode, MirrorSettings.clip_format)
+        self.output_spinner = Spinner(
+            text=next((label for label, value in OUTPUT_MODES.items() if value == output), 'Output: Photo'),
+            values=list(OUTPUT_MODES),
+            size_hint=(1, 0.08),
+            font_size='18sp'
+        )
+        self.output_spinner.bind(text=self.on_output_selected)
+        layout.add_widget(self.output_spinner)
+
         screen_label = Label(
             text='Display Output (MagicMirror)',
             font_size='20sp',
@@ -82,8 +115,7 @@ class AdminScreen(Screen):
         )
         layout.add_widget(screen_label)
 
-        screens = get_monitors()
-        screen_options = [f"Screen {i + 1}" for i, _ in enumerate(screens)] or ["Screen 1"]
+        screen_options = [f"Screen {i + 1}" for i in range(monitor_count())] or ["Screen 1"]
 
         self.screen_spinner = Spinner(
             text=f"Screen {MirrorSettings.selected_screen + 1}",
@@ -94,6 +126,15 @@ class AdminScreen(Screen):
         self.screen_spinner.bind(text=self.on_screen_selected)
         layout.add_widget(self.screen_spinner)
 
+        self.kiosk_spinner = Spinner(
+            text=next(label for label, value in KIOSK_MODES.items() if value == MirrorSettings.kiosk_autostart),
+            values=list(KIOSK_MODES),
+            size_hint=(1, 0.08),
+            font_size='18sp'
+        )
+        self.kiosk_spinner.bind(text=self.on_kiosk_selected)
+        layout.add_widget(self.kiosk_spinner)
+
         photos_info = Label(
             text=f' Photos saved to:\n{PHOTOS_DIR}',
             font_size='16sp',
@@ -115,7 +156,7 @@ class AdminScreen(Screen):
         exit_info.bind(size=lambda instance, value: setattr(instance, 'text_size', value))
         layout.add_widget(exit_info)
 
-        layout.add_widget(Label(size_hint=(1, 0.31)))
+        layout.add_widget(Label(size_hint=(1, 0.15)))
 
         start_button = Button(
             text='START MAGIC MIRROR',
@@ -129,41 +170,94 @@ class AdminScreen(Screen):
 
         self.add_widget(layout)
 
+        for camera in camera_discovery.cached():
+            self._add_camera(camera)
+        Clock.schedule_once(lambda dt: self.detect_cameras())
+
+    def on_pre_enter(self):
+        """Shrink the window back to the admin size."""
+        Window.size = MirrorSettings.ADMIN_SIZE
+
     def _update_bg(self, instance, value):
         """Update background rectangle size."""
         self.bg_rect.size = instance.size
         self.bg_rect.pos = instance.pos
 
     def detect_cameras(self):
-        """Detect available cameras using OpenCV."""
-        available = []
+        """Detect cameras in the background, filling the spinner as they answer."""
+        camera_discovery.discover(
+            on_found=lambda camera: Clock.schedule_once(lambda dt: self._add_camera(camera)),
+            on_done=lambda cameras: Clock.schedule_once(lambda dt: self._on_detection_done(cameras))
+        )
 
-        for i in range(5):
-            cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)
-            if cap.isOpened():
-                available.append(i)
-                cap.release()
+    def _add_camera(self, camera):
+        """Add or update a camera in the spinner."""
+        previous = self.cameras.get(camera["index"]) or {}
+        self.cameras[camera["index"]] = camera
+        self._refresh_camera_spinner()
+        if camera["index"] == MirrorSettings.selected_camera and previous.get("modes") != camera.get("modes"):
+            self._refresh_mode_spinner()
+
+    def _on_detection_done(self, cameras):
+        """Drop cached cameras that did not answer this time."""
+        self.cameras = {camera["index"]: camera for camera in cameras}
+        self._refresh_camera_spinner()
+        if not self.cameras:
+            MirrorSettings.selected_camera = -1
+            self.camera_spinner.text = "No cameras detected"
+            print("No cameras detected.")
 
+    def _refresh_camera_spinner(self):
+        available = sorted(self.cameras)
         MirrorSettings.available_cameras = available
+        self.camera_spinner.values = [f"Camera {i}" for i in available]
 
-        if not available:
-            MirrorSettings.selected_camera = -1
-            print("No cameras detected.")
-        elif MirrorSettings.selected_camera not in available:
+        if available and MirrorSettings.selected_camera not in available:
             MirrorSettings.selected_camera = available[0]
-
-        print(f"Detected cameras: {available}")
+        if available:
+            self.camera_spinner.text = f"Camera {MirrorSettings.selected_camera}"
+
+    def _refresh_mode_spinner(self, keep_selection=True):
+        """List the selected camera's modes, keeping the chosen one if it is still there."""
+        camera = self.cameras.get(MirrorSettings.selected_camera)
+        modes = (camera or {}).get("modes") or []
+        labels = [mode_label(m) for m in modes]
+        self.mode_spinner.values = ["Camera mode: Auto"] + labels
+        if self.restored_mode in modes:
+            self.mode_spinner.text = mode_label(self.restored_mode)
+            self.restored_mode = None
+        elif not (keep_selection and self.mode_spinner.text in labels):
+            self.mode_spinner.text = "Camera mode: Auto"
+        self.on_mode_selected(self.mode_spinner, self.mode_spinner.text)
 
     def on_camera_selected(self, spinner, text):
         """Handle camera selection from the spinner."""
-        if "No cameras" in text:
+        if not text.startswith("Camera "):
             return
         try:
             camera_index = int(text.split()[-1])
-            MirrorSettings.selected_camera = camera_index
-            print(f"Camera selected: {camera_index}")
         except ValueError:
             print("Invalid camera selection.")
+            return
+        changed = camera_index != MirrorSettings.selected_camera
+        if changed:
+            MirrorSettings.selected_camera = camera_index
+            self.restored_mode = None
+            print(f"Camera selected: {camera_index}")
+        self._refresh_mode_spinner(keep_selection=not changed)
+
+    def on_mode_selected(self, spinner, text):
+        """Apply the chosen capture mode; Auto picks the fastest one."""
+        camera = self.cameras.get(MirrorSettings.selected_camera)
+        if camera is None:
+            return
+        modes = camera.get("modes") or []
+        mode = next((m for m in modes if mode_label(m) == text), None)
+        if mode is None:
+            mode = best_mode(camera, MirrorSettings.CAMERA_SIZE)
+        MirrorSettings.camera_mode = mode
+        if mode:
+            print(f"Camera mode: {mode_label(mode)}")
 
     def on_orientation_selected(self, spinner, text):
         """Handle orientation change."""
@@ -175,6 +269,16 @@ class AdminScreen(Screen):
         MirrorSettings.orientation = text.lower()
         print(f"Orientation set to: {MirrorSettings.orientation}")
 
+    def on_output_selected(self, spinner, text):
+        """Switch between still photos and animated clips."""
+        MirrorSettings.capture_mode, MirrorSettings.clip_format = OUTPUT_MODES[text]
+        print(f"Output set to: {MirrorSettings.capture_mode} ({MirrorSettings.clip_format})")
+
+    def on_kiosk_selected(self, spinner, text):
+        """Choose whether the next boot skips this screen."""
+        MirrorSettings.kiosk_autostart = KIOSK_MODES[text]
+        print(f"Kiosk auto-start: {'on' if MirrorSettings.kiosk_autostart else 'off'}")
+
     def on_screen_selected(self, spinner, text):
         """Handle screen selection from the spinner."""
         try:
@@ -190,21 +294,9 @@ class AdminScreen(Screen):
             print("Cannot start: No camera available.")
             return
 
-        screens = get_monitors()
-        index = getattr(MirrorSettings, "selected_screen", 0)
-
-        if len(screens) > index:
-            screen = screens[index]
-            Window.left = screen.x
-            Window.top = screen.y
-            Window.size = (screen.width, screen.height)
-            Window.borderless = True
-            print(f"Opening Magic Mirror on Screen {index + 1}")
-        else:
-            Window.fullscreen = 'auto'
-            print("Fullscreen on main screen.")
-
-        print(f"Window resized to: {Window.size}")
+        kiosk_config.save(self.cameras.get(MirrorSettings.selected_camera))
+        open_mirror_window(getattr(MirrorSettings, "selected_screen", 0))
+        camera_service.start(MirrorSettings.selected_camera)
         self.manager.current = 'start'
         print(f"Starting Magic Mirror with camera {MirrorSettings.selected_camera}")
         print(f"Orientation: {MirrorSettings.orientation}")
\ No newline at end of file
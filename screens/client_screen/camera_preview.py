@@ -0,0 +1,135 @@
+import time
+from collections import deque
+
+from kivy.uix.floatlayout import FloatLayout
+from kivy.uix.label import Label
+from kivy.graphics import Color, Rectangle
+from kivy.graphics.texture import Texture
+from kivy.clock import Clock
+
+from services.filters import FILTERS
+from services.session_metrics import session_metrics
+from screens.client_screen.filter_shader import ShaderFilter
+
+# Image corners (bottom-left, bottom-right, top-right, top-left) in texture
+# space. Frames are blitted top row first, so v=0 is the top of the image.
+IMAGE_CORNERS = ((0, 1), (1, 1), (1, 0), (0, 0))
+
+
+def preview_tex_coords(texture, rotate_cw=False, mirror=False):
+    """Return Rectangle tex_coords showing the frame rotated and/or mirrored."""
+    corners = list(IMAGE_CORNERS)
+    if rotate_cw:
+        corners = corners[1:] + corners[:1]
+    if mirror:
+        corners = [corners[1], corners[0], corners[3], corners[2]]
+
+    u0, v0 = texture.uvpos
+    du, dv = texture.uvsize
+    coords = []
+    for u, v in corners:
+        coords.extend((u0 + u * du, v0 + v * dv))
+    return tuple(coords)
+
+
+class CameraPreview(FloatLayout):
+    """Live camera preview fed from the capture service frame buffer.
+
+    Each new BGR frame is blitted into a reused texture; the vertical flip,
+    mirroring and orientation rotation are expressed as texture coordinates,
+    so no pixel copies happen on the UI thread; a colour filter runs as a
+    fragment shader. The image covers the widget keeping its aspect ratio.
+    """
+
+    def __init__(self, camera, **kwargs):
+        super().__init__(**kwargs)
+        self.camera = camera
+        self.mirror = True
+        self.rotate_cw = False
+        self.texture = None
+        self.fps = 0.0
+        self.upload_ms = 0.0
+        self._last_seq = 0
+        self._first_frame_pending = False
+        self._frame_times = deque(maxlen=30)
+
+        self.shader_filter = ShaderFilter()
+        self.canvas.add(self.shader_filter.context)
+        with self.shader_filter.context:
+            Color(1, 1, 1, 1)
+            self.rect = Rectangle(pos=self.pos, size=(0, 0))
+        self.bind(pos=self._update_rect, size=self._update_rect)
+
+        self.debug_label = Label(
+            text='',
+            font_size='18sp',
+            size_hint=(None, None),
+            size=(320, 60),
+            pos_hint={'x': 0, 'top': 1},
+            color=(0, 1, 0, 1),
+            opacity=0
+        )
+        self.add_widget(self.debug_label)
+
+    def start(self, rotate_cw=False, mirror=True, show_debug=False, lut_filter=FILTERS["none"]):
+        """Begin uploading frames on every UI frame."""
+        self.rotate_cw = rotate_cw
+        self.mirror = mirror
+        self.shader_filter.set_filter(lut_filter)
+        self.debug_label.opacity = 1 if show_debug else 0
+        self._frame_times.clear()
+        self._first_frame_pending = True
+        self._update_rect()
+        Clock.unschedule(self._update_texture)
+        Clock.schedule_interval(self._update_texture, 0)
+
+    def stop(self):
+        """Stop uploading frames; the texture is kept for the next session."""
+        Clock.unschedule(self._update_texture)
+
+    def _update_texture(self, dt):
+        """Upload the newest frame if the camera produced one."""
+        frame = self.camera.latest_frame()
+        if frame is None or frame.seq == self._last_seq:
+            return
+        self._last_seq = frame.seq
+
+        image = frame.image
+        height, width = image.shape[:2]
+        started = time.perf_counter()
+
+        if self.texture is None or self.texture.size != (width, height):
+            self.texture = Texture.create(size=(width, height))
+            self.rect.texture = self.texture
+            self._update_rect()
+
+        self.texture.blit_buffer(image.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+        self.canvas.ask_update()
+        if self._first_frame_pending:
+            self._first_frame_pending = False
+            session_metrics.end("first_frame")
+        self.upload_ms = (time.perf_counter() - started) * 1000
+
+        self._frame_times.append(frame.timestamp)
+        if len(self._frame_times) > 1:
+            elapsed = self._frame_times[-1] - self._frame_times[0]
+            if elapsed > 0:
+                self.fps = (len(self._frame_times) - 1) / elapsed
+
+        if self.debug_label.opacity:
+            self.debug_label.text = f"{self.fps:.1f} fps | upload {self.upload_ms:.1f} ms"
+
+    def _update_rect(self, *args):
+        """Size the preview to cover the widget and refresh texture coords."""
+        if self.texture is None:
+            return
+
+        self.rect.tex_coords = preview_tex_coords(self.texture, self.rotate_cw, self.mirror)
+
+        image_w, image_h = self.texture.size
+        if self.rotate_cw:
+            image_w, image_h = image_h, image_w
+        scale = max(self.width / image_w, self.height / image_h)
+        width, height = image_w * scale, image_h * scale
+        self.rect.size = (width, height)
+        self.rect.pos = (self.center_x - width / 2, self.center_y - height / 2)
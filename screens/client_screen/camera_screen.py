@@ -1,12 +1,25 @@
-import cv2
+import time
 from kivy.uix.screenmanager import Screen
-from kivy.uix.video import Video
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.label import Label
 from kivy.clock import Clock
 from kivy.animation import Animation
 
-from config import POSE_VIDEO_PATH, MirrorSettings, PHOTOS_DIR, get_next_id
+from config import POSE_VIDEO_PATH, MirrorSettings, PHOTOS_DIR, MASTERS_DIR, CLIPS_DIR, get_next_id
+from services.camera_service import camera_service
+from services.photo_writer import photo_writer
+from services.encoders import get_encoder, encode_frame
+from services.gallery_index import gallery_index
+from services.derivatives import derivative_service
+from services.media_manager import media_manager
+from services.frame_selection import frame_selector, burst_frames
+from services.clip_recorder import ClipRecorder
+from services.session_metrics import session_metrics
+from services.capture_session import CaptureSession
+from services.filters import get_filter
+from services.memory_monitor import memory_monitor
+from screens.client_screen.camera_preview import CameraPreview
+from screens.client_screen.frame_cache_video import create_video
 
 
 class CameraScreen(Screen):
@@ -16,19 +29,26 @@ class CameraScreen(Screen):
         super().__init__(**kwargs)
 
         self.layout = FloatLayout()
-        self.camera = None
-        self.current_frame = None
+        self.camera = camera_service
+        if MirrorSettings.chroma_key:
+            from services.chroma_key import chroma_key_stage
+            self.camera = chroma_key_stage
+            memory_monitor.register("chroma frames", chroma_key_stage.frames)
+        self.clip_recorder = ClipRecorder(self.camera)
 
-        self.video = Video(
-            source=POSE_VIDEO_PATH,
-            state='stop',
-            options={'eos': 'stop'},
+        self.preview = CameraPreview(self.camera, size_hint=(1, 1))
+        self.layout.add_widget(self.preview)
+
+        self.video = create_video(
+            POSE_VIDEO_PATH,
+            loop=True,
             fit_mode='fill',
-            size_hint=(1, 1),
-            volume=0
+            size_hint=(1, 1)
         )
-        self.video.bind(eos=self.on_video_end)
+        media_manager.on_loop(self.video, self.on_video_end)
         self.layout.add_widget(self.video)
+        media_manager.register(self.name, self.video, keep_loaded=True)
+        media_manager.preload(self.video)
 
         self.countdown_label = Label(
             text='',
@@ -40,125 +60,263 @@ class CameraScreen(Screen):
         )
         self.layout.add_widget(self.countdown_label)
 
+        self.notice_label = Label(
+            text='',
+            font_size='48sp',
+            size_hint=(1, 1),
+            color=(1, 1, 1, 1),
+            bold=True,
+            halign='center',
+            opacity=0
+        )
+        self.layout.add_widget(self.notice_label)
+
         self.add_widget(self.layout)
 
         self.video_finished = False
-        self.countdown_value = 5
+        self.session_started = 0.0
+        self.shutter_time = 0.0
+        self.countdown_value = MirrorSettings.countdown_seconds
         self.video_play_count = 0
+        self.face_tracker = None
+        if MirrorSettings.hands_free or MirrorSettings.auto_framing:
+            from services.face_tracker import face_tracker
+            self.face_tracker = face_tracker
+
+    @property
+    def current_frame(self):
+        """Return the newest frame from the capture service, if any."""
+        frame = self.camera.latest_frame()
+        return frame.image if frame is not None else None
 
     def on_enter(self):
-        """Play the pose prompt video when entering this screen."""
-        self.video.source = POSE_VIDEO_PATH
-        self.video.state = 'play'
+        """Play the pose prompt video and warm up the camera."""
+        self.session_started = time.monotonic()
+        session_metrics.end("touch")
+        session_metrics.begin("pose_video")
+        session_metrics.begin("first_frame")
+        self.camera.acquire()
+        if self.face_tracker is not None:
+            self.face_tracker.acquire()
+        media_manager.restart(self.video)
         self.video_play_count = 0
         self.video_finished = False
         self.video.opacity = 1
+
+        if MirrorSettings.live_preview:
+            self.video.opacity = MirrorSettings.pose_video_opacity
+            self.preview.start(
+                rotate_cw=MirrorSettings.orientation == "vertical",
+                mirror=MirrorSettings.mirror_preview,
+                show_debug=MirrorSettings.show_debug_overlay,
+                lut_filter=get_filter(MirrorSettings.camera_filter)
+            )
         print("Playing pose prompt video")
 
     def on_leave(self):
-        """Release resources when leaving this screen."""
-        if self.camera:
-            self.camera.release()
-            self.camera = None
-            print("Camera released")
-
+        """Release the camera and stop timers when leaving this screen."""
+        self.preview.stop()
+        self.camera.release()
+        if self.face_tracker is not None:
+            self.face_tracker.release()
         Clock.unschedule(self.update_countdown)
-        Clock.unschedule(self.update_camera_frame)
-
-        if self.video.state == 'play':
-            self.video.state = 'stop'
-
-    def init_camera(self):
-        """Initialize the selected camera."""
-        camera_index = MirrorSettings.selected_camera
-        self.camera = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)
-
-        if not self.camera.isOpened():
-            print(f"Failed to open camera {camera_index}")
-            return
+        media_manager.rewind(self.video)
 
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
+    def on_video_end(self, instance):
+        """Count pose video loops and start countdown after several of them.
 
-        Clock.schedule_interval(self.update_camera_frame, 1.0 / 30.0)
-        print(f"Camera {camera_index} initialized")
-
-    def update_camera_frame(self, dt):
-        """Update the current camera frame."""
-        if not self.camera:
-            return
-
-        ret, frame = self.camera.read()
-        if ret:
-            self.current_frame = frame
-
-    def on_video_end(self, instance, value):
-        """Handle pose video end and start countdown after several loops."""
+        The video loops in place, so replays never seek or reopen the file.
+        """
         self.video_play_count += 1
-        if self.video_play_count < 3:
-            self.video.seek(0)
-            self.video.state = 'play'
-        else:
+        if self.video_play_count >= MirrorSettings.pose_video_loops:
             if not self.video_finished:
                 self.video_finished = True
+                self.video.state = 'pause'
+                session_metrics.end("pose_video")
                 fade_out = Animation(opacity=0, duration=0.3)
                 fade_out.bind(on_complete=lambda *args: self.start_countdown())
                 fade_out.start(self.video)
 
     def start_countdown(self):
         """Start countdown before capturing a photo."""
-        self.init_camera()
-        Clock.schedule_interval(self.update_camera_frame, 1.0 / 10.0)
-        self.countdown_value = 5
+        self.countdown_value = MirrorSettings.countdown_seconds
         self.countdown_label.text = str(self.countdown_value)
         self.countdown_label.opacity = 1
+        session_metrics.begin("countdown")
         Clock.schedule_interval(self.update_countdown, 1.0)
 
     def update_countdown(self, dt):
-        """Update countdown display each second."""
+        """Update countdown display each second.
+
+        In hands-free mode the countdown is cut short once every face is
+        centred in the frame.
+        """
+        short = MirrorSettings.face_centered_countdown
+        if (MirrorSettings.hands_free and self.countdown_value > short
+                and self.face_tracker.centered()):
+            print(f"Everyone is centred, countdown shortened to {short}")
+            self.countdown_value = short
         if self.countdown_value > 0:
             self.countdown_label.text = str(self.countdown_value)
             self.countdown_value -= 1
         else:
             Clock.unschedule(self.update_countdown)
             self.countdown_label.opacity = 0
+            session_metrics.end("countdown")
+            if MirrorSettings.capture_mode == "photo":
+                self.capture_photo()
+            else:
+                self.capture_clip()
+
+    def capture_clip(self):
+        """Record a short clip or boomerang instead of a still.
+
+        Frames are encoded while they are recorded; the booth returns to the
+        start screen after the last frame and the file is finished in the
+        background. Falls back to a still if recording cannot start.
+        """
+        clip_format = MirrorSettings.clip_format
+        clip_path = CLIPS_DIR / f"clip_{get_next_id()}.{clip_format}"
+        started = self.clip_recorder.record(
+            clip_path,
+            clip_format,
+            boomerang=MirrorSettings.capture_mode == "boomerang",
+            on_recorded=self._on_clip_recorded,
+            on_done=self._on_clip_done
+        )
+        if not started:
             self.capture_photo()
+            return
+        self.countdown_label.text = 'REC'
+        self.countdown_label.opacity = 1
+        session_metrics.begin("record_clip")
+        print(f"Recording clip: {clip_path}")
+
+    def _on_clip_recorded(self):
+        """End the session once the last clip frame is captured."""
+        self.countdown_label.opacity = 0
+        session_metrics.end("record_clip")
+        session_metrics.begin("return_to_start")
+        self.manager.current = 'start'
+
+    def _on_clip_done(self, path, error):
+        if error is None:
+            print(f"Clip saved: {path}")
 
     def capture_photo(self):
-        """Capture photo and save it to the gallery."""
-        Clock.unschedule(self.update_camera_frame)
+        """Capture a burst around the shutter moment and save the best frame.
+
+        Frames up to burst_window / 2 seconds after the shutter are awaited,
+        then the burst is scored on a worker. The edit screen opens as soon
+        as the best frame is known; the photo is written in parallel.
+        """
         print("Capturing photo...")
+        self.shutter_time = time.monotonic()
+        session_metrics.begin("capture")
+        if MirrorSettings.burst_size > 1:
+            Clock.schedule_once(self._select_burst_frame, MirrorSettings.burst_window / 2)
+        else:
+            self.save_photo(self.current_frame)
 
-        if self.current_frame is not None:
+    def _select_burst_frame(self, dt):
+        """Hand the frames around the shutter moment to the frame selector."""
+        frames = burst_frames(
+            self.camera.frames.snapshot(), self.shutter_time,
+            MirrorSettings.burst_size, MirrorSettings.burst_window
+        )
+        if not frames:
+            self.save_photo(self.current_frame)
+            return
+        frame_selector.submit(frames, self.shutter_time, lambda frame: self.save_photo(frame.image))
+
+    def save_photo(self, frame_to_save):
+        """Hand frame_to_save to the edit screen and persist it in parallel."""
+        session_metrics.end("capture")
+        session = session_metrics.session_id
+        if frame_to_save is not None:
+            if MirrorSettings.auto_framing:
+                frame_to_save = self.auto_frame(frame_to_save)
             photo_id = get_next_id()
-            filename = f"photo_{photo_id}.png"
+            encoder = get_encoder(MirrorSettings.output_preset)
+            filename = f"photo_{photo_id}{encoder.extension}"
             filepath = PHOTOS_DIR / filename
-            frame_to_save = self.current_frame
+            captured_at = time.time()
+            capture = CaptureSession(
+                photo_id, filepath, frame_to_save,
+                rotate_cw=MirrorSettings.orientation == "vertical",
+                started=self.session_started,
+                shutter_time=self.shutter_time
+            )
+            image, rotate_cw = capture.image, capture.rotate_cw
+            exif_formats = MirrorSettings.exif_orientation_formats
+            width, height = capture.size
+
+            def on_written(path, data):
+                gallery_index.record_original(
+                    int(photo_id), path, width, height, encoder.name, len(data), captured_at
+                )
+                derivative_service.submit(path)
+
+            queued = photo_writer.submit(
+                filepath,
+                lambda: session_metrics.timed(
+                    "encode", lambda: encode_frame(image, encoder, rotate_cw, exif_formats), session
+                ),
+                after_write=on_written
+            )
+            if not queued:
+                self.show_notice('Guardando fotos anteriores...\nIntentalo de nuevo en unos segundos')
+                return
 
-            if MirrorSettings.orientation == "vertical":
-                frame_to_save = cv2.rotate(frame_to_save, cv2.ROTATE_90_CLOCKWISE)
+            # The master is only a backup of a photo that is already queued.
+            if MirrorSettings.master_preset:
+                master = get_encoder(MirrorSettings.master_preset)
+                master_path = MASTERS_DIR / f"photo_{photo_id}{master.extension}"
+                if not photo_writer.submit(
+                    master_path,
+                    lambda: encode_frame(image, master, rotate_cw, exif_formats)
+                ):
+                    print(f"Writer queue full, master copy skipped: {master_path}")
 
-            cv2.imwrite(str(filepath), frame_to_save)
-            print(f"Photo saved: {filepath}")
+            print(f"Photo queued: {filepath}")
             print(f"Photo ID: {photo_id}")
-            Clock.schedule_once(lambda dt: self.go_to_edit(str(filepath)), 0.3)
+            self.go_to_edit(capture)
         else:
             print("No frame available")
 
-    def go_to_edit(self, photo_path):
-        """Switch to photo edit screen after saving the photo."""
-        if self.camera:
-            self.camera.release()
-            self.camera = None
-            print("Camera released for edit")
-
-        Clock.unschedule(self.update_camera_frame)
+    def show_notice(self, text, seconds=3):
+        """Tell the guests why there is no photo, then go back to the start screen."""
         Clock.unschedule(self.update_countdown)
+        self.countdown_label.opacity = 0
+        self.notice_label.text = text
+        self.notice_label.opacity = 1
+
+        def back_to_start(dt):
+            self.notice_label.opacity = 0
+            if self.manager.current == self.name:
+                session_metrics.begin("return_to_start")
+                self.manager.current = 'start'
+
+        Clock.schedule_once(back_to_start, seconds)
 
-        self.video.state = 'stop'
+    def auto_frame(self, image):
+        """Crop image to the face tracker's suggestion; the slice is a view, not a copy."""
+        height, width = image.shape[:2]
+        crop = self.face_tracker.suggest_crop(width, height)
+        if crop is None:
+            return image
+        x0, y0, x1, y1 = crop
+        print(f"Auto framing: cropped to {x1 - x0}x{y1 - y0} at ({x0}, {y0})")
+        return image[y0:y1, x0:x1]
+
+    def go_to_edit(self, capture):
+        """Switch to the edit screen with the captured frame in memory."""
+        Clock.unschedule(self.update_countdown)
 
         edit_screen = self.manager.get_screen('photo_edit')
-        edit_screen.photo_path = photo_path
+        edit_screen.session_started = self.session_started
+        edit_screen.capture = capture
+        edit_screen.photo_path = capture.photo_path
 
         self.manager.current = 'photo_edit'
-        print(f"Transitioning to edit screen with photo: {photo_path}")
\ No newline at end of file
+        print(f"Transitioning to edit screen with photo: {capture.photo_path}")
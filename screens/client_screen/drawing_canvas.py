@@ -0,0 +1,132 @@
+import math
+from array import array
+
+from kivy.uix.widget import Widget
+from kivy.graphics import Color, Line, InstructionGroup
+
+from config import MirrorSettings
+
+
+class CanvasStroke:
+    """One freehand stroke stored as decimated points and segmented Lines.
+
+    Points live in a flat array('f') of x, y pairs. Each move event only
+    rebuilds the last Line segment, so its cost is bounded by segment_size
+    rather than growing with the stroke length. Points closer than
+    min_distance to the previous one are dropped, and points that continue
+    a straight run (within max_angle radians, up to max_run pixels) replace
+    the previous point instead of adding a new one.
+    """
+
+    def __init__(self, color, width, x, y, min_distance=2.0, max_angle=0.08,
+                 max_run=24.0, segment_size=64):
+        self.color = color
+        self.width = width
+        self.points = array('f', (x, y))
+        self.min_distance = min_distance
+        self.max_angle = max_angle
+        self.max_run = max_run
+        self.segment_size = segment_size
+
+        self.group = InstructionGroup()
+        self.group.add(Color(*color))
+        self._segment_start = 0
+        self._line = None
+        self._start_segment()
+
+    def _start_segment(self):
+        self._line = Line(points=self.points[self._segment_start:].tolist(), width=self.width)
+        self.group.add(self._line)
+
+    def _refresh_segment(self):
+        self._line.points = self.points[self._segment_start:].tolist()
+
+    def add_point(self, x, y):
+        """Add a touch point; return False if it was decimated away."""
+        points = self.points
+        last_x, last_y = points[-2], points[-1]
+        dx, dy = x - last_x, y - last_y
+        if dx * dx + dy * dy < self.min_distance * self.min_distance:
+            return False
+
+        if len(points) - 2 > self._segment_start:
+            anchor_x, anchor_y = points[-4], points[-3]
+            run_x, run_y = x - anchor_x, y - anchor_y
+            last_run_x, last_run_y = last_x - anchor_x, last_y - anchor_y
+            cross = last_run_x * run_y - last_run_y * run_x
+            dot = last_run_x * run_x + last_run_y * run_y
+            if (dot > 0 and abs(math.atan2(cross, dot)) < self.max_angle
+                    and run_x * run_x + run_y * run_y < self.max_run * self.max_run):
+                points[-2] = x
+                points[-1] = y
+                self._refresh_segment()
+                return True
+
+        points.extend((x, y))
+        if (len(points) - self._segment_start) // 2 > self.segment_size:
+            self._segment_start = len(points) - 4
+            self._start_segment()
+        else:
+            self._refresh_segment()
+        return True
+
+
+class DrawingCanvas(Widget):
+    """Canvas widget for freehand drawing."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.drawing = False
+        self.current_color = (1, 0, 0, 1)
+        self.line_width = 5
+        self.strokes = []
+        self.touch_trace = []
+
+    def begin_stroke(self, x, y):
+        """Start a new stroke at (x, y) in the current color."""
+        stroke = CanvasStroke(self.current_color, self.line_width, x, y)
+        self.canvas.add(stroke.group)
+        self.strokes.append(stroke)
+        return stroke
+
+    def on_touch_down(self, touch):
+        if not self.collide_point(*touch.pos):
+            return False
+        self.drawing = True
+        touch.ud['stroke'] = self.begin_stroke(touch.x, touch.y)
+        if MirrorSettings.record_touch_traces:
+            touch.ud['trace'] = [[touch.x, touch.y]]
+            self.touch_trace.append(touch.ud['trace'])
+        return True
+
+    def on_touch_move(self, touch):
+        if not self.drawing or 'stroke' not in touch.ud:
+            return False
+        touch.ud['stroke'].add_point(touch.x, touch.y)
+        if 'trace' in touch.ud:
+            touch.ud['trace'].append([touch.x, touch.y])
+        return True
+
+    def on_touch_up(self, touch):
+        if 'stroke' in touch.ud:
+            self.drawing = False
+        return True
+
+    def set_color(self, color):
+        """Change the current drawing color."""
+        self.current_color = color
+
+    def clear_last(self):
+        """Undo the last drawn stroke."""
+        if self.strokes:
+            stroke = self.strokes.pop()
+            self.canvas.remove(stroke.group)
+
+    def clear_all(self):
+        """Clear all drawings."""
+        self.canvas.clear()
+        self.strokes = []
+
+    def reset_trace(self):
+        """Forget the recorded touch positions."""
+        self.touch_trace = []
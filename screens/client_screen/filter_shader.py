@@ -0,0 +1,63 @@
+from kivy.graphics import RenderContext, BindTexture
+from kivy.graphics.texture import Texture
+
+from services.filters import FILTERS
+
+# Same maths as services.filters.apply_filter: colour mix, then a nearest
+# texel lookup per channel in a 256x1 RGB curve texture.
+FILTER_FS = '''
+$HEADER$
+uniform sampler2D lut;
+uniform vec3 mix_r;
+uniform vec3 mix_g;
+uniform vec3 mix_b;
+
+vec2 lut_coord(float value) {
+    return vec2(value * (255.0 / 256.0) + 0.5 / 256.0, 0.5);
+}
+
+void main(void) {
+    vec4 color = frag_color * texture2D(texture0, tex_coord0);
+    vec3 mixed = clamp(vec3(dot(mix_r, color.rgb), dot(mix_g, color.rgb), dot(mix_b, color.rgb)), 0.0, 1.0);
+    gl_FragColor = vec4(
+        texture2D(lut, lut_coord(mixed.r)).r,
+        texture2D(lut, lut_coord(mixed.g)).g,
+        texture2D(lut, lut_coord(mixed.b)).b,
+        color.a
+    );
+}
+'''
+
+
+class ShaderFilter:
+    """A RenderContext that draws its instructions through a LutFilter.
+
+    Add context to a widget's canvas and draw the image inside it; only
+    those instructions are filtered. Switching filters re-uploads the 768
+    byte curve and three uniforms, so it is free to do per session.
+    """
+
+    def __init__(self):
+        self.context = RenderContext(
+            use_parent_projection=True,
+            use_parent_modelview=True,
+            use_parent_frag_modelview=True
+        )
+        self.context.shader.fs = FILTER_FS
+        if not self.context.shader.success:
+            print("Filter shader failed to compile; showing images unfiltered")
+        self.lut_texture = Texture.create(size=(256, 1), colorfmt='rgb')
+        self.lut_texture.mag_filter = 'nearest'
+        self.lut_texture.min_filter = 'nearest'
+        self.context.add(BindTexture(texture=self.lut_texture, index=1))
+        self.context['lut'] = 1
+        self.lut_filter = None
+        self.set_filter(FILTERS["none"])
+
+    def set_filter(self, lut_filter):
+        """Show everything in the context through lut_filter."""
+        self.lut_filter = lut_filter
+        self.lut_texture.blit_buffer(lut_filter.curve.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
+        for name, row in zip(("mix_r", "mix_g", "mix_b"), lut_filter.mix):
+            self.context[name] = [float(v) for v in row]
+        self.context.ask_update()
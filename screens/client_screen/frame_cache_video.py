@@ -0,0 +1,158 @@
+import threading
+from pathlib import Path
+
+from kivy.uix.image import Image as KivyImage
+from kivy.uix.video import Video
+from kivy.graphics.texture import Texture
+from kivy.properties import BooleanProperty, NumericProperty, OptionProperty
+from kivy.clock import Clock
+
+from config import MirrorSettings
+from services.memory_monitor import memory_monitor
+
+UPLOADS_PER_FRAME = 4
+
+
+def scaled_size(width, height, max_edge):
+    """Return (width, height) shrunk so the longest edge is at most max_edge."""
+    scale = min(1.0, max_edge / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def fits_frame_cache(path, max_edge, budget_bytes):
+    """True if every frame of path, scaled to max_edge, fits in budget_bytes."""
+    import cv2
+
+    capture = cv2.VideoCapture(str(path))
+    try:
+        if not capture.isOpened():
+            return False
+        frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        width, height = scaled_size(
+            int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), max_edge
+        )
+    finally:
+        capture.release()
+    # GPU drivers usually store 3-channel textures padded to 4 bytes per pixel.
+    return 0 < frames * width * height * 4 <= budget_bytes
+
+
+class FrameCacheVideo(KivyImage):
+    """Plays a short clip from textures decoded once, for seek-free loops.
+
+    The clip is decoded and scaled on a worker thread and uploaded a few
+    frames per UI frame. Playback only swaps textures, so rewinding or
+    looping costs nothing. It mirrors the parts of kivy's Video used by the
+    screens: state, eos, loaded, seek(), and position and duration, which
+    are counted in frames instead of seconds.
+    """
+
+    state = OptionProperty('stop', options=['play', 'pause', 'stop'])
+    eos = BooleanProperty(False)
+    loaded = BooleanProperty(False)
+    position = NumericProperty(0)
+    duration = NumericProperty(-1)
+
+    def __init__(self, source_path, loop=False, max_edge=960, **kwargs):
+        super().__init__(**kwargs)
+        self.source_path = str(source_path)
+        self.loop = loop
+        self.max_edge = max_edge
+        self.frames = []
+        self.fps = 30.0
+        threading.Thread(target=self._decode, name="frame-cache-decode", daemon=True).start()
+
+    def _decode(self):
+        import cv2
+
+        capture = cv2.VideoCapture(self.source_path)
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        images = []
+        while True:
+            ok, image = capture.read()
+            if not ok:
+                break
+            height, width = image.shape[:2]
+            size = scaled_size(width, height, self.max_edge)
+            if size != (width, height):
+                image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            images.append(image)
+        capture.release()
+        print(f"Frame cache: decoded {len(images)} frames of {self.source_path}")
+        Clock.schedule_once(lambda dt: self._upload(images, fps))
+
+    def _upload(self, images, fps):
+        """Turn decoded frames into textures, a few per UI frame."""
+        for image in images[:UPLOADS_PER_FRAME]:
+            height, width = image.shape[:2]
+            texture = Texture.create(size=(width, height), colorfmt='bgr')
+            texture.blit_buffer(image.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+            texture.flip_vertical()
+            self.frames.append(texture)
+        del images[:UPLOADS_PER_FRAME]
+        if images:
+            Clock.schedule_once(lambda dt: self._upload(images, fps))
+            return
+
+        self.fps = fps
+        self.duration = len(self.frames)
+        self.loaded = bool(self.frames)
+        self._show(0)
+        if self.state == 'play':
+            self._start()
+
+    def _show(self, position):
+        if self.frames:
+            self.position = position
+            self.texture = self.frames[position]
+
+    def _start(self):
+        Clock.unschedule(self._next_frame)
+        Clock.schedule_interval(self._next_frame, 1.0 / self.fps)
+
+    def on_state(self, instance, value):
+        Clock.unschedule(self._next_frame)
+        if value == 'stop':
+            self._show(0)
+        elif value == 'play':
+            if self.eos:
+                self._show(0)
+            self.eos = False
+            if self.loaded:
+                self._start()
+
+    @property
+    def occupancy(self):
+        """Return (frame count, estimated texture bytes)."""
+        return len(self.frames), sum(width * height * 4 for width, height in (f.size for f in self.frames))
+
+    def seek(self, percent, precise=True):
+        """Jump to a position given as a fraction of the clip."""
+        if self.frames:
+            self._show(min(len(self.frames) - 1, int(percent * len(self.frames))))
+
+    def _next_frame(self, dt):
+        position = self.position + 1
+        if position < len(self.frames):
+            self._show(position)
+        elif self.loop:
+            self._show(0)
+        else:
+            self.state = 'pause'
+            self.eos = True
+
+
+def create_video(source, loop=False, volume=0, **kwargs):
+    """Return a FrameCacheVideo for short clips when enabled, else a Video.
+
+    Cached clips are silent; volume only applies to streamed ones.
+    """
+    if MirrorSettings.video_frame_cache:
+        max_edge = MirrorSettings.video_frame_cache_edge
+        budget = MirrorSettings.video_frame_cache_mb * 1024 * 1024
+        if fits_frame_cache(source, max_edge, budget):
+            video = FrameCacheVideo(source, loop=loop, max_edge=max_edge, **kwargs)
+            memory_monitor.register(f"video {Path(source).name}", video, budget)
+            return video
+        print(f"Frame cache: {source} is too long to cache, streaming it instead")
+    return Video(source=source, options={'eos': 'loop' if loop else 'pause'}, volume=volume, **kwargs)
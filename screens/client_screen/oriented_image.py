@@ -0,0 +1,53 @@
+from kivy.uix.widget import Widget
+from kivy.graphics import Color, Rectangle
+from kivy.properties import BooleanProperty, ListProperty, ObjectProperty
+
+from screens.client_screen.camera_preview import preview_tex_coords
+from screens.client_screen.filter_shader import ShaderFilter
+
+
+class OrientedImage(Widget):
+    """Shows an unrotated camera texture in the booth orientation.
+
+    The texture holds the frame as captured, blitted top row first like the
+    camera preview, and the rotation is applied through texture
+    coordinates. The image is fitted inside the widget keeping its aspect
+    ratio; norm_image_size is the displayed size, as on kivy's Image.
+    The image is drawn through a ShaderFilter; see set_filter().
+    """
+
+    texture = ObjectProperty(None, allownone=True)
+    rotate_cw = BooleanProperty(False)
+    norm_image_size = ListProperty([0, 0])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.shader_filter = ShaderFilter()
+        self.canvas.add(self.shader_filter.context)
+        with self.shader_filter.context:
+            Color(1, 1, 1, 1)
+            self.rect = Rectangle(pos=self.pos, size=(0, 0))
+        self.bind(pos=self._update_rect, size=self._update_rect,
+                  texture=self._update_rect, rotate_cw=self._update_rect)
+
+    def set_filter(self, lut_filter):
+        """Show the image through lut_filter on the GPU."""
+        self.shader_filter.set_filter(lut_filter)
+
+    def _update_rect(self, *args):
+        texture = self.texture
+        self.rect.texture = texture
+        if texture is None:
+            self.rect.size = (0, 0)
+            self.norm_image_size = [0, 0]
+            return
+
+        self.rect.tex_coords = preview_tex_coords(texture, self.rotate_cw)
+        image_w, image_h = texture.size
+        if self.rotate_cw:
+            image_w, image_h = image_h, image_w
+        scale = min(self.width / image_w, self.height / image_h)
+        width, height = image_w * scale, image_h * scale
+        self.rect.size = (width, height)
+        self.rect.pos = (self.center_x - width / 2, self.center_y - height / 2)
+        self.norm_image_size = [width, height]
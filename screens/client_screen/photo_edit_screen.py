@@ -1,3 +1,6 @@
+import json
+import threading
+import time
 from pathlib import Path
 from kivy.uix.screenmanager import Screen
 from kivy.uix.floatlayout import FloatLayout
@@ -5,60 +8,43 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.image import Image as KivyImage
 from kivy.uix.scatter import Scatter
-from kivy.graphics import Color, Line
 from kivy.clock import Clock
-from kivy.properties import StringProperty
-from kivy.uix.widget import Widget
-from kivy.uix.scrollview import ScrollView
-
-from config import PHOTOS_DIR, ASSETS_DIR
-
-
-class DrawingCanvas(Widget):
-    """Canvas widget for freehand drawing."""
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.drawing = False
-        self.current_color = (1, 0, 0, 1)
-        self.line_width = 5
-        self.lines_batch = []
-
-    def on_touch_down(self, touch):
-        if not self.collide_point(*touch.pos):
-            return False
-        self.drawing = True
-        with self.canvas:
-            Color(*self.current_color)
-            touch.ud['line'] = Line(points=(touch.x, touch.y), width=self.line_width)
-            self.lines_batch.append((self.current_color, touch.ud['line']))
-        return True
-
-    def on_touch_move(self, touch):
-        if not self.drawing or 'line' not in touch.ud:
-            return False
-        touch.ud['line'].points += [touch.x, touch.y]
-        return True
-
-    def on_touch_up(self, touch):
-        if 'line' in touch.ud:
-            self.drawing = False
-        return True
-
-    def set_color(self, color):
-        """Change the current drawing color."""
-        self.current_color = color
-
-    def clear_last(self):
-        """Undo the last drawn line."""
-        if self.lines_batch:
-            _, line = self.lines_batch.pop()
-            self.canvas.remove(line)
-
-    def clear_all(self):
-        """Clear all drawings."""
-        self.canvas.clear()
-        self.lines_batch = []
+from kivy.graphics.texture import Texture
+from kivy.properties import StringProperty, ObjectProperty
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+
+from config import PHOTOS_DIR, ASSETS_DIR, EDITS_DIR, TRACES_DIR, MirrorSettings
+from services.photo_writer import photo_writer
+from services.encoders import get_encoder
+from services.compositor import EditDocument, Stroke, StickerPlacement, render
+from services.gallery_index import gallery_index
+from services.derivatives import derivative_service
+from services.id_allocator import PHOTO_ID_PATTERN
+from services.sticker_assets import sticker_atlas, sticker_textures
+from services.session_metrics import session_metrics
+from services.filters import FILTERS, get_filter
+from services.memory_monitor import memory_monitor
+from screens.client_screen.drawing_canvas import DrawingCanvas
+from screens.client_screen.oriented_image import OrientedImage
+from screens.client_screen.frame_cache_video import scaled_size
+
+
+def encode_trace(trace):
+    """Serialize a touch trace for benchmarks/bench_drawing.py."""
+    TRACES_DIR.mkdir(parents=True, exist_ok=True)
+    return json.dumps(trace).encode()
+
+
+class StickerTrayItem(ButtonBehavior, KivyImage):
+    """Recycled tray thumbnail; its data supplies source, path and callback."""
+    sticker_path = StringProperty("")
+    callback = ObjectProperty(None, allownone=True)
+
+    def on_press(self):
+        if self.callback:
+            self.callback(Path(self.sticker_path))
 
 
 class PhotoEditScreen(Screen):
@@ -69,12 +55,13 @@ class PhotoEditScreen(Screen):
         super().__init__(**kwargs)
 
         self.main_layout = FloatLayout()
+        self.session_started = 0.0
+        self.capture = None
+        self._photo_texture = None
+        self._photo_width = None
+        self.filter_name = "none"
 
-        self.photo_widget = KivyImage(
-            size_hint=(1, 1),
-            allow_stretch=True,
-            keep_ratio=True
-        )
+        self.photo_widget = OrientedImage(size_hint=(1, 1))
         self.main_layout.add_widget(self.photo_widget)
 
         self.drawing_canvas = DrawingCanvas(size_hint=(1, 1))
@@ -94,6 +81,7 @@ class PhotoEditScreen(Screen):
         self.create_sticker_tray()
 
         self.add_widget(self.main_layout)
+        memory_monitor.register("edit photo", self)
 
     def create_control_panel(self):
         """Create the control panel with drawing tools."""
@@ -138,47 +126,84 @@ class PhotoEditScreen(Screen):
         clear_btn.bind(on_press=lambda x: (self.drawing_canvas.clear_all(), self.stickers_container.clear_widgets()))
         self.panel.add_widget(clear_btn)
 
-        save_btn = Button(
+        self.filter_btn = Button(
+            text='Filtro: Normal',
+            background_color=(0.5, 0.3, 0.7, 1),
+            background_normal=''
+        )
+        self.filter_btn.bind(on_press=lambda x: self.next_filter())
+        self.panel.add_widget(self.filter_btn)
+
+        self.save_btn = Button(
             text='Sacar otra foto',
             background_color=(0.2, 0.8, 0.2, 1),
             background_normal='',
+            halign='center',
             size_hint_x=1.5
         )
-        save_btn.bind(on_press=self.save_and_continue)
-        self.panel.add_widget(save_btn)
+        self.save_btn.bind(on_press=self.save_and_continue)
+        self.panel.add_widget(self.save_btn)
 
         self.main_layout.add_widget(self.panel)
 
+    def set_filter(self, name):
+        """Show the photo through the named filter; it is applied on save too."""
+        lut_filter = get_filter(name)
+        self.filter_name = lut_filter.name
+        self.photo_widget.set_filter(lut_filter)
+        self.filter_btn.text = f'Filtro: {lut_filter.label}'
+
+    def next_filter(self):
+        """Cycle to the next filter."""
+        names = list(FILTERS)
+        self.set_filter(names[(names.index(self.filter_name) + 1) % len(names)])
+
     def create_sticker_tray(self):
-        """Create the horizontal sticker tray."""
-        self.sticker_scroll = ScrollView(
+        """Create the horizontal, recycled sticker tray."""
+        self.sticker_scroll = RecycleView(
             size_hint=(1, 0.1),
             pos_hint={'x': 0, 'y': 0.12},
             do_scroll_x=True,
             do_scroll_y=False
         )
+        self.sticker_scroll.viewclass = StickerTrayItem
 
-        sticker_tray = BoxLayout(
+        sticker_tray = RecycleBoxLayout(
             orientation='horizontal',
-            size_hint_x=None,
+            size_hint=(None, 1),
+            default_size_hint=(None, 1),
             padding=(10, 5),
             spacing=10
         )
         sticker_tray.bind(minimum_width=sticker_tray.setter('width'))
-
-        for sticker_path in self.available_stickers:
-            sticker_btn = Button(
-                background_normal=str(sticker_path),
-                size_hint=(None, 1),
-                width=sticker_tray.height,
-                border=(0, 0, 0, 0)
-            )
-            sticker_btn.bind(on_press=lambda x, path=sticker_path: self.add_sticker_from_tray(path))
-            sticker_tray.add_widget(sticker_btn)
+        self.sticker_scroll.bind(
+            height=lambda rv, height: setattr(sticker_tray, 'default_size', (height - 10, None))
+        )
 
         self.sticker_scroll.add_widget(sticker_tray)
         self.main_layout.add_widget(self.sticker_scroll)
 
+        threading.Thread(target=self._prepare_sticker_atlas, daemon=True).start()
+
+    def _prepare_sticker_atlas(self):
+        """Build or validate the thumbnail atlas off the UI thread."""
+        try:
+            sticker_atlas.ensure(self.available_stickers)
+        except Exception as e:
+            print(f"Error building sticker atlas: {e}")
+        Clock.schedule_once(self._fill_sticker_tray, 0)
+
+    def _fill_sticker_tray(self, dt):
+        """Populate the tray with one data entry per sticker."""
+        self.sticker_scroll.data = [
+            {
+                'source': sticker_atlas.url(path),
+                'sticker_path': str(path),
+                'callback': self.add_sticker_from_tray
+            }
+            for path in self.available_stickers
+        ]
+
     def load_stickers(self):
         """Load sticker images from the assets folder."""
         if self.sticker_dir.exists():
@@ -198,12 +223,13 @@ class PhotoEditScreen(Screen):
             )
 
             sticker_img = KivyImage(
-                source=str(sticker_path),
+                texture=sticker_textures.get(sticker_path),
                 size=(150, 150),
                 allow_stretch=True
             )
 
             scatter.add_widget(sticker_img)
+            scatter.sticker_path = str(sticker_path)
             scatter.center = self.center
             self.stickers_container.add_widget(scatter)
             print(f"Added sticker: {sticker_path.name}")
@@ -211,15 +237,60 @@ class PhotoEditScreen(Screen):
             print(f"Error adding sticker: {e}")
 
     def on_enter(self):
-        """Load the selected photo when entering this screen."""
-        if self.photo_path:
-            Clock.schedule_once(self._load_photo, 0)
+        """Show the captured photo, straight from memory when it was handed over.
+
+        Without a capture session the photo is loaded from disk once the
+        writer has saved it.
+        """
+        session_metrics.begin("edit_texture")
+        self.set_filter(MirrorSettings.camera_filter)
+        if self.capture is not None:
+            self._show_image(self.capture.image, self.capture.rotate_cw)
+            session_metrics.end("edit_texture")
+            session_metrics.record("shutter_to_edit", time.monotonic() - self.capture.shutter_time)
+        elif self.photo_path:
+            photo_writer.when_done(self.photo_path, self._on_photo_written)
+
+    def _show_image(self, image, rotate_cw=False):
+        """Upload a BGR image into the photo texture, reusing it when possible.
+
+        The image is uploaded unrotated; rotate_cw turns it through texture
+        coordinates. Images larger than photo_texture_max_edge are shown
+        downscaled; the edit is still rendered on the full-resolution capture.
+        """
+        height, width = image.shape[:2]
+        self._photo_width = height if rotate_cw else width
+        display_size = scaled_size(width, height, MirrorSettings.photo_texture_max_edge)
+        if display_size != (width, height):
+            import cv2
+            image = cv2.resize(image, display_size, interpolation=cv2.INTER_AREA)
+            width, height = display_size
+        texture = self._photo_texture
+        if texture is None or texture.size != (width, height):
+            texture = Texture.create(size=(width, height), colorfmt='bgr')
+            self._photo_texture = texture
+        texture.blit_buffer(image.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+        self.photo_widget.rotate_cw = rotate_cw
+        self.photo_widget.texture = texture
+        self.photo_widget.canvas.ask_update()
+
+    def _on_photo_written(self, path, error):
+        """Load the captured photo after its background write finished."""
+        if error is not None:
+            print(f"Captured photo unavailable: {error}")
+            return
+        if path == self.photo_path:
+            self._load_photo(0)
 
     def _load_photo(self, dt):
-        """Load photo asynchronously."""
+        """Load the photo from disk, applying its EXIF orientation."""
+        import cv2
         try:
-            self.photo_widget.source = self.photo_path
-            self.photo_widget.reload()
+            image = cv2.imread(self.photo_path, cv2.IMREAD_COLOR)
+            if image is None:
+                raise FileNotFoundError(self.photo_path)
+            self._show_image(image)
+            session_metrics.end("edit_texture")
             print(f"Photo loaded for editing: {self.photo_path}")
         except Exception as e:
             print(f"Error loading photo: {e}")
@@ -227,6 +298,7 @@ class PhotoEditScreen(Screen):
     def save_and_continue(self, instance):
         """Save the edited photo and return to start screen."""
         print("Saving edited photo...")
+        session_metrics.begin("save")
         Clock.schedule_once(self._save_photo, 0)
 
     def _save_photo(self, dt):
@@ -236,32 +308,106 @@ class PhotoEditScreen(Screen):
                 print("No photo texture available")
                 return
 
+            encoder = get_encoder(MirrorSettings.output_preset)
             original_path = Path(self.photo_path)
-            edited_path = original_path.parent / f"{original_path.stem}_edited{original_path.suffix}"
-
-            self.panel.opacity = 0
-            self.sticker_scroll.opacity = 0
-
-            self.main_layout.export_to_png(str(edited_path))
-
-            self.panel.opacity = 1
-            self.sticker_scroll.opacity = 1
+            edited_path = original_path.parent / f"{original_path.stem}_edited{encoder.extension}"
+
+            document = self.build_edit_document()
+            base_image = self.capture.image if self.capture is not None else None
+            rotate_cw = self.capture.rotate_cw if self.capture is not None else False
+            edit_path = EDITS_DIR / f"{original_path.stem}.json"
+            photo_id = int(PHOTO_ID_PATTERN.match(original_path.name).group(1))
+            session_seconds = time.monotonic() - self.session_started if self.session_started else None
+            session = session_metrics.session_id
+
+            def on_written(path, data):
+                session_metrics.end("save", session)
+                gallery_index.record_edited(photo_id, path, len(data), session_seconds)
+                derivative_service.submit(path)
+
+            queued = photo_writer.submit(
+                edited_path,
+                lambda: encoder.encode(render(document, base_image, rotate_cw)).data,
+                after_write=on_written
+            )
+            if not queued:
+                # Keep the edit on screen so the guests can press save again.
+                self.show_busy()
+                return
+            print(f"Edited photo queued: {edited_path}")
 
-            print(f"Edited photo saved: {edited_path}")
-            Clock.schedule_once(self._cleanup_and_return, 0.5)
+            photo_writer.submit(edit_path, lambda: document.to_json().encode())
+            if self.drawing_canvas.touch_trace:
+                trace = self.drawing_canvas.touch_trace
+                photo_writer.submit(TRACES_DIR / f"{original_path.stem}.json", lambda: encode_trace(trace))
+            Clock.schedule_once(self._cleanup_and_return, 0)
         except Exception as e:
             print(f"Error saving photo: {e}")
             self._cleanup_and_return(0)
 
+    def show_busy(self, seconds=3):
+        """Tell the guests on the save button that the photo was not saved yet."""
+        self.save_btn.text = 'Guardando fotos anteriores...\nIntentalo de nuevo'
+        Clock.schedule_once(lambda dt: setattr(self.save_btn, 'text', 'Sacar otra foto'), seconds)
+
+    def _photo_mapping(self):
+        """Return (to_image, scale) mapping screen coordinates to photo pixels."""
+        photo_w = self._photo_width
+        norm_w, norm_h = self.photo_widget.norm_image_size
+        left = self.photo_widget.center_x - norm_w / 2
+        top = self.photo_widget.center_y + norm_h / 2
+        scale = photo_w / norm_w
+
+        def to_image(x, y):
+            return (x - left) * scale, (top - y) * scale
+
+        return to_image, scale
+
+    def build_edit_document(self):
+        """Describe the current strokes and stickers in photo pixel coordinates."""
+        to_image, scale = self._photo_mapping()
+
+        strokes = []
+        for stroke in self.drawing_canvas.strokes:
+            points = stroke.points
+            mapped = []
+            for i in range(0, len(points) - 1, 2):
+                mapped.extend(to_image(points[i], points[i + 1]))
+            strokes.append(Stroke(list(stroke.color), stroke.width * 2 * scale, mapped))
+
+        stickers = []
+        for scatter in reversed(self.stickers_container.children):
+            sticker_img = scatter.children[0]
+            half_w, half_h = sticker_img.norm_image_size[0] / 2, sticker_img.norm_image_size[1] / 2
+            cx, cy = sticker_img.center
+            local_corners = [(cx - half_w, cy + half_h), (cx + half_w, cy + half_h), (cx - half_w, cy - half_h)]
+            corners = [list(to_image(*scatter.to_parent(x, y))) for x, y in local_corners]
+            stickers.append(StickerPlacement(scatter.sticker_path, corners))
+
+        return EditDocument(self.photo_path, strokes, stickers, self.filter_name)
+
     def _cleanup_and_return(self, dt):
         """Clear data and return to the start screen."""
         self.drawing_canvas.clear_all()
+        self.drawing_canvas.reset_trace()
         self.stickers_container.clear_widgets()
-        self.photo_widget.source = ""
+        self.photo_widget.texture = None
+        self.capture = None
+        self._photo_width = None
         self.photo_path = ""
+        session_metrics.begin("return_to_start")
         self.manager.current = 'start'
         print("Returned to start screen")
 
+    @property
+    def occupancy(self):
+        """Return (texture count, estimated bytes) of the reusable photo texture."""
+        texture = self._photo_texture
+        if texture is None:
+            return 0, 0
+        width, height = texture.size
+        return 1, width * height * 4
+
     def on_leave(self):
         """Cleanup when leaving the screen."""
         pass
\ No newline at end of file
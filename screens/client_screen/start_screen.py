@@ -1,7 +1,10 @@
 from kivy.uix.screenmanager import Screen
-from kivy.uix.video import Video
 from kivy.core.window import Window
+from kivy.clock import Clock
 from config import START_VIDEO_PATH, MirrorSettings
+from services.media_manager import media_manager
+from services.session_metrics import session_metrics
+from screens.client_screen.frame_cache_video import create_video
 import time
 import os
 
@@ -12,20 +15,52 @@ class StartScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.corner_touches = []
+        self.entered_at = 0.0
+        self.faces_cleared = False
 
-        self.video = Video(
-            source=START_VIDEO_PATH,
-            state='play',
-            options={'eos': 'loop'},
+        self.video = create_video(
+            START_VIDEO_PATH,
+            loop=True,
             fit_mode='fill',
-            size_hint=(1, 1),
-            volume=0
+            size_hint=(1, 1)
         )
         self.add_widget(self.video)
+        media_manager.register(self.name, self.video)
 
     def on_enter(self):
         """Play the intro video when entering this screen."""
         self.video.state = 'play'
+        session_metrics.end("return_to_start")
+        session_metrics.end_session()
+        if MirrorSettings.hands_free:
+            from services.face_tracker import face_tracker
+            self.entered_at = time.monotonic()
+            self.faces_cleared = False
+            face_tracker.acquire()
+            Clock.schedule_interval(self._check_faces, 0.2)
+
+    def on_leave(self):
+        """Stop watching for guests while another screen is shown."""
+        if MirrorSettings.hands_free:
+            from services.face_tracker import face_tracker
+            Clock.unschedule(self._check_faces)
+            face_tracker.release()
+
+    def _check_faces(self, dt):
+        """Start a session once faces stayed in view for face_dwell_seconds.
+
+        Guests still in front after their session do not retrigger it: the
+        faces must leave the view first, or face_rearm_seconds must pass.
+        """
+        from services.face_tracker import face_tracker
+        present = face_tracker.present_for()
+        if not present:
+            self.faces_cleared = True
+            return
+        rearmed = self.faces_cleared or time.monotonic() - self.entered_at >= MirrorSettings.face_rearm_seconds
+        if rearmed and present >= MirrorSettings.face_dwell_seconds:
+            print(f"Faces in view for {present:.1f}s - going to camera")
+            self.start_session()
 
     def on_touch_down(self, touch):
         """Handle screen touch events."""
@@ -41,9 +76,17 @@ class StartScreen(Screen):
                 return True
 
         print("Screen touched - going to camera")
-        self.manager.current = 'camera'
+        self.start_session()
         return True
 
+    def start_session(self):
+        """Begin a guest session and switch to the camera screen."""
+        if self.manager.current != self.name:
+            return
+        session_metrics.start_session()
+        session_metrics.begin("touch")
+        self.manager.current = 'camera'
+
     def return_to_admin(self):
         """Return to the admin screen."""
         from config import MirrorSettings
@@ -0,0 +1,45 @@
+import time
+from kivy.uix.screenmanager import ScreenManager
+from kivy.clock import Clock
+
+
+class LazyScreenManager(ScreenManager):
+    """ScreenManager that builds screens the first time they are needed.
+
+    Screens are registered with a factory returning the Screen. A screen is
+    built when it is first made current or looked up with get_screen(), or
+    earlier by prewarm(), which builds the remaining screens one per frame
+    while the app is idle.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+
+    def register(self, name, factory):
+        """Register factory() as the builder of the screen called name."""
+        self.factories[name] = factory
+
+    def has_screen(self, name):
+        return name in self.factories or super().has_screen(name)
+
+    def get_screen(self, name):
+        factory = self.factories.pop(name, None)
+        if factory is not None:
+            started = time.perf_counter()
+            screen = factory()
+            self.add_widget(screen)
+            print(f"Screen '{name}' built in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return screen
+        return super().get_screen(name)
+
+    def prewarm(self, delay=1.0, names=None):
+        """Build every pending screen (or those in names) in the background, one per frame."""
+        def build_next(dt):
+            pending = [name for name in self.factories if names is None or name in names]
+            if not pending:
+                return
+            self.get_screen(pending[0])
+            Clock.schedule_once(build_next, 0)
+
+        Clock.schedule_once(build_next, delay)
@@ -0,0 +1,67 @@
+from kivy.uix.label import Label
+from kivy.graphics import Color, Rectangle
+from kivy.clock import Clock
+
+from services.session_metrics import session_metrics
+
+BAR_WIDTH = 20
+
+
+def histogram_rows(histogram, unit=1000, suffix="ms"):
+    """Text rows with one bar per bucket, scaled to the fullest bucket."""
+    peak = max(histogram.counts) or 1
+    rows = []
+    for bound, count in zip((*histogram.buckets, None), histogram.counts):
+        label = f"<={bound * unit:g}{suffix}" if bound is not None else "more"
+        rows.append(f"  {label:>8} {'#' * round(BAR_WIDTH * count / peak):<{BAR_WIDTH}} {count}")
+    return rows
+
+
+class MetricsOverlay(Label):
+    """Debug overlay with p50/p95 per session stage and timing histograms.
+
+    Added on top of every screen by the app and refreshed once a second.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('font_size', '14sp')
+        kwargs.setdefault('font_name', 'RobotoMono-Regular')
+        kwargs.setdefault('size_hint', (None, None))
+        kwargs.setdefault('halign', 'left')
+        kwargs.setdefault('valign', 'top')
+        super().__init__(**kwargs)
+        with self.canvas.before:
+            Color(0, 0, 0, 0.7)
+            self.bg_rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(texture_size=self._fit, pos=self._update_bg)
+        self._event = None
+
+    def _fit(self, *args):
+        self.size = self.texture_size
+        self._update_bg()
+
+    def _update_bg(self, *args):
+        self.bg_rect.pos = self.pos
+        self.bg_rect.size = self.size
+
+    def start(self):
+        self.refresh()
+        self._event = Clock.schedule_interval(self.refresh, 1.0)
+
+    def stop(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def refresh(self, *args):
+        rows = [f"{'stage':<16}{'p50 ms':>9}{'p95 ms':>9}{'n':>6}"]
+        for stage, (p50, p95, count) in sorted(session_metrics.stage_quantiles().items()):
+            rows.append(f"{stage:<16}{p50 * 1000:>9.0f}{p95 * 1000:>9.0f}{count:>6}")
+        rows.append("")
+        rows.append(f"frame time ({session_metrics.frame_times.count} frames)")
+        rows += histogram_rows(session_metrics.frame_times)
+        rows.append(f"gc pauses ({session_metrics.gc_pauses.count})")
+        rows += histogram_rows(session_metrics.gc_pauses)
+        self.text = "\n".join(rows)
+        if self.parent is not None:
+            self.top = self.parent.height
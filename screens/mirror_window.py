@@ -0,0 +1,24 @@
+from kivy.core.window import Window
+from screeninfo import get_monitors
+
+
+def monitor_count():
+    """Return the number of connected monitors."""
+    return len(get_monitors())
+
+
+def open_mirror_window(index):
+    """Cover monitor index with a borderless window, or go fullscreen if it is missing."""
+    screens = get_monitors()
+    if len(screens) > index:
+        screen = screens[index]
+        Window.left = screen.x
+        Window.top = screen.y
+        Window.size = (screen.width, screen.height)
+        Window.borderless = True
+        print(f"Opening Magic Mirror on Screen {index + 1}")
+    else:
+        Window.fullscreen = 'auto'
+        print("Fullscreen on main screen.")
+
+    print(f"Window resized to: {Window.size}")
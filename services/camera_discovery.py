@@ -0,0 +1,212 @@
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config import CAMERA_CACHE_FILE, MirrorSettings
+from services.fileio import write_atomic
+
+CANDIDATE_SIZES = [(3840, 2160), (1920, 1080), (1280, 720), (640, 480)]
+CANDIDATE_FOURCCS = ["MJPG", "YUYV"]
+
+
+def decode_fourcc(value):
+    """Turn a CAP_PROP_FOURCC value into its four-letter code."""
+    value = int(value)
+    return "".join(chr((value >> 8 * i) & 0xFF) for i in range(4)).strip("\x00")
+
+
+def device_identity(index):
+    """Return (key, name) for a camera index.
+
+    On Linux the key combines the /dev/video path with the USB vendor and
+    product IDs from sysfs, so cached capabilities follow the physical
+    camera. Elsewhere only the index is available.
+    """
+    if not sys.platform.startswith("linux"):
+        return f"index:{index}", f"Camera {index}"
+
+    sysfs = Path(f"/sys/class/video4linux/video{index}")
+    name = f"Camera {index}"
+    usb_id = ""
+    try:
+        name = (sysfs / "name").read_text().strip() or name
+        modalias = (sysfs / "device" / "modalias").read_text().strip()
+        if modalias.startswith("usb:v"):
+            usb_id = f"{modalias[5:9]}:{modalias[10:14]}".lower()
+    except OSError:
+        pass
+    return f"/dev/video{index}|{usb_id}", name
+
+
+def measure_fps(capture, frames=12, warmup=3, budget=3.0):
+    """Read a few frames and return the achieved frame rate (0 on failure)."""
+    deadline = time.monotonic() + budget
+    for _ in range(warmup):
+        if not capture.read()[0] or time.monotonic() > deadline:
+            return 0.0
+    started = time.monotonic()
+    for _ in range(frames):
+        if not capture.read()[0] or time.monotonic() > deadline:
+            return 0.0
+    return frames / (time.monotonic() - started)
+
+
+def probe_modes(capture):
+    """Try common sizes and pixel formats; return the modes that work."""
+    import cv2
+
+    modes = []
+    seen = set()
+    for fourcc in CANDIDATE_FOURCCS:
+        for width, height in CANDIDATE_SIZES:
+            capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            actual = (
+                int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                decode_fourcc(capture.get(cv2.CAP_PROP_FOURCC)),
+            )
+            if actual[:2] != (width, height) or actual in seen:
+                continue
+            seen.add(actual)
+            fps = measure_fps(capture)
+            if fps:
+                modes.append({"width": actual[0], "height": actual[1], "fourcc": actual[2], "fps": round(fps, 1)})
+
+    modes.sort(key=lambda m: (-m["width"] * m["height"], -m["fps"]))
+    return modes
+
+
+def mode_label(mode):
+    return f"{mode['width']}x{mode['height']} {mode['fourcc']} @{mode['fps']:.0f}fps"
+
+
+def best_mode(camera, size):
+    """Return the fastest mode at size, or the fastest mode overall."""
+    modes = camera.get("modes") or []
+    matching = [m for m in modes if (m["width"], m["height"]) == tuple(size)] or modes
+    return max(matching, key=lambda m: m["fps"], default=None)
+
+
+class CameraDiscovery:
+    """Finds cameras in parallel and caches their capabilities on disk.
+
+    Every index is opened on its own thread. Indices that have not opened
+    within open_timeout seconds are reported missing, so one slow or absent
+    device never delays the others. Supported modes are probed once per
+    physical camera and reused from the cache afterwards; a probe that
+    finds no modes is not cached. The camera the capture service is
+    streaming from is listed without being opened a second time.
+    """
+
+    def __init__(self, cache_file, max_index=5, open_timeout=3.0):
+        self.cache_file = Path(cache_file)
+        self.max_index = max_index
+        self.open_timeout = open_timeout
+        self._cache_lock = threading.Lock()
+
+    def cached(self):
+        """Return cameras from the last discovery, for an instant first list."""
+        cache = self._load_cache()
+        return sorted(cache.get("last_seen", []), key=lambda c: c["index"])
+
+    def discover(self, on_found=None, on_done=None):
+        """Start discovery in the background.
+
+        on_found(camera) is called from worker threads whenever a camera is
+        found or its modes are known; on_done(cameras) once all are settled.
+        """
+        thread = threading.Thread(target=self._discover, args=(on_found, on_done), name="camera-discovery", daemon=True)
+        thread.start()
+        return thread
+
+    def _load_cache(self):
+        try:
+            return json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        with self._cache_lock:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.cache_file, json.dumps(cache, indent=2).encode())
+
+    def _discover(self, on_found, on_done):
+        from services.camera_service import camera_service
+        from services.capture_backends import get_backend
+
+        started = time.monotonic()
+        cache = self._load_cache()
+        devices = cache.setdefault("devices", {})
+        opened = [threading.Event() for _ in range(self.max_index)]
+        results = [None] * self.max_index
+        timed_out = set()
+        backend = get_backend()
+
+        def report(camera):
+            if on_found is not None and camera["index"] not in timed_out:
+                on_found(camera)
+
+        def in_use(index):
+            """Report the camera the capture service is streaming from without opening it again."""
+            opened[index].set()
+            key, name = device_identity(index)
+            modes = devices.get(key, {}).get("modes")
+            if not modes and camera_service.camera_mode:
+                modes = [camera_service.camera_mode]
+            camera = {"index": index, "key": key, "name": name, "modes": modes or []}
+            report(camera)
+            results[index] = camera
+            return camera
+
+        def probe(index):
+            # Probing a streaming device competes with its capture thread and
+            # yields empty or slow modes.
+            if camera_service.is_running and camera_service.camera_index == index:
+                return in_use(index)
+            capture = backend.open(index)
+            try:
+                opened[index].set()
+                if not capture.isOpened() or index in timed_out:
+                    return None
+                key, name = device_identity(index)
+                camera = {"index": index, "key": key, "name": name, "modes": devices.get(key, {}).get("modes")}
+                report(camera)
+                if not camera["modes"]:
+                    camera["modes"] = probe_modes(capture)
+                    # An empty result (busy device, timeouts) is retried next time.
+                    if camera["modes"]:
+                        devices[key] = {"name": name, "modes": camera["modes"]}
+                    report(camera)
+                results[index] = camera
+                return camera
+            finally:
+                capture.release()
+
+        pool = ThreadPoolExecutor(max_workers=self.max_index)
+        futures = [pool.submit(probe, i) for i in range(self.max_index)]
+
+        deadline = started + self.open_timeout
+        for index, event in enumerate(opened):
+            if not event.wait(max(0.0, deadline - time.monotonic())):
+                timed_out.add(index)
+                print(f"Camera {index} did not answer within {self.open_timeout:.0f}s")
+
+        for index, future in enumerate(futures):
+            if index not in timed_out:
+                future.result()
+        pool.shutdown(wait=False)
+
+        cameras = [camera for camera in results if camera is not None]
+        cache["last_seen"] = cameras
+        self._save_cache(cache)
+        print(f"Detected cameras: {[c['index'] for c in cameras]} in {time.monotonic() - started:.1f}s")
+        if on_done is not None:
+            on_done(cameras)
+
+
+camera_discovery = CameraDiscovery(CAMERA_CACHE_FILE, open_timeout=MirrorSettings.camera_open_timeout)
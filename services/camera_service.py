@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+from config import MirrorSettings
+from services.session_metrics import session_metrics
+
+Frame = namedtuple("Frame", ["seq", "timestamp", "image"])
+
+
+class FrameBuffer:
+    """Small ring buffer holding the most recent camera frames.
+
+    The capture thread appends and the UI thread reads without taking a
+    lock: deque appends, indexing and copies are atomic under the GIL.
+    """
+
+    def __init__(self, size=4):
+        self._frames = deque(maxlen=max(1, size))
+        self._seq = 0
+
+    def publish(self, image, timestamp):
+        """Store a new frame with its monotonic timestamp."""
+        self._seq += 1
+        self._frames.append(Frame(self._seq, timestamp, image))
+
+    def latest(self):
+        """Return the newest frame, or None if nothing was captured yet."""
+        try:
+            return self._frames[-1]
+        except IndexError:
+            return None
+
+    def snapshot(self):
+        """Return the buffered frames, oldest first."""
+        return list(self._frames.copy())
+
+    def clear(self):
+        """Drop all buffered frames."""
+        self._frames.clear()
+
+    @property
+    def occupancy(self):
+        """Return (frame count, bytes held by their images)."""
+        frames = self._frames.copy()
+        return len(frames), sum(frame.image.nbytes for frame in frames)
+
+
+class CameraService:
+    """Keeps the selected camera open on a dedicated capture thread.
+
+    Screens call acquire() while they need frames and release() when done.
+    The device stays open between sessions so auto-exposure has settled
+    before the countdown; it is only closed after
+    MirrorSettings.camera_idle_timeout seconds without users (0 keeps it
+    open until stop()).
+    """
+
+    def __init__(self, buffer_size=4):
+        self.frames = FrameBuffer(buffer_size)
+        self.camera_index = None
+        self.camera_mode = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._users = 0
+        self._idle_since = time.monotonic()
+
+    @property
+    def is_running(self):
+        """True while the capture thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, camera_index=None):
+        """Open the camera in the background unless it is already running."""
+        if camera_index is None:
+            camera_index = MirrorSettings.selected_camera
+        if camera_index < 0:
+            print("Camera service: no camera selected")
+            return
+
+        mode = MirrorSettings.camera_mode
+        if self.is_running:
+            if (camera_index, mode) == (self.camera_index, self.camera_mode) and not self._stop_event.is_set():
+                return
+            if not self.stop():
+                return
+
+        with self._lock:
+            self.camera_index = camera_index
+            self.camera_mode = mode
+            self._idle_since = time.monotonic()
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(camera_index, mode, self._stop_event),
+                name="camera-capture",
+                daemon=True
+            )
+            self._thread.start()
+
+    def acquire(self):
+        """Register a user of the camera and make sure it is running."""
+        with self._lock:
+            self._users += 1
+        self.start()
+
+    def release(self):
+        """Unregister a user; the camera keeps running until idle timeout."""
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0:
+                self._idle_since = time.monotonic()
+
+    def latest_frame(self):
+        """Return the newest Frame published by the capture thread."""
+        return self.frames.latest()
+
+    def stop(self, timeout=2.0):
+        """Stop the capture thread and close the device.
+
+        Returns False if the thread is still blocked in a read after timeout
+        seconds (e.g. a camera being unplugged). Its reference is kept so
+        start() does not run a second capture loop into the same buffer.
+        """
+        thread = self._thread
+        self._stop_event.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+            if thread.is_alive():
+                print(f"Camera {self.camera_index} did not stop within {timeout:g}s, not restarting it yet")
+                return False
+        self._thread = None
+        return True
+
+    def _is_idle(self):
+        timeout = MirrorSettings.camera_idle_timeout
+        if not timeout or self._users:
+            return False
+        return time.monotonic() - self._idle_since > timeout
+
+    def _run(self, camera_index, mode, stop_event):
+        """Capture loop executed on the camera thread."""
+        from services.capture_backends import get_backend
+
+        backend = get_backend()
+        started = time.monotonic()
+        capture = backend.open(camera_index, mode)
+        session_metrics.record("camera_open", time.monotonic() - started)
+        if not capture.isOpened():
+            print(f"Failed to open camera {camera_index} ({backend.name})")
+            capture.release()
+            return
+
+        self.frames.clear()
+        print(f"Camera {camera_index} initialized ({backend.name})")
+
+        failures = 0
+        try:
+            while not stop_event.is_set():
+                ret, image = capture.read()
+                if not ret:
+                    failures += 1
+                    if failures > 50:
+                        print(f"Camera {camera_index} stopped delivering frames")
+                        break
+                    time.sleep(0.01)
+                    continue
+
+                failures = 0
+                self.frames.publish(image, time.monotonic())
+
+                if self._is_idle():
+                    print(f"Camera {camera_index} idle, closing")
+                    break
+        finally:
+            capture.release()
+            print("Camera released")
+
+
+camera_service = CameraService(MirrorSettings.frame_buffer_size)
@@ -0,0 +1,241 @@
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from config import MirrorSettings
+from services.camera_discovery import decode_fourcc
+
+
+class CaptureBackend:
+    """Opens camera sources through one OpenCV capture API."""
+
+    name = "any"
+    api = cv2.CAP_ANY
+
+    def open(self, index, mode=None):
+        """Open a device and apply mode; return the capture object."""
+        capture = cv2.VideoCapture(index, self.api)
+        if capture.isOpened():
+            self.configure(capture, mode)
+        return capture
+
+    def configure(self, capture, mode):
+        """Apply a capture mode dict, or the default camera size."""
+        if mode:
+            capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode["fourcc"]))
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, mode["width"])
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, mode["height"])
+            capture.set(cv2.CAP_PROP_FPS, mode["fps"])
+        else:
+            width, height = MirrorSettings.CAMERA_SIZE
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+
+class DirectShowBackend(CaptureBackend):
+    """Windows DirectShow, the backend the booth has always used."""
+
+    name = "dshow"
+    api = cv2.CAP_DSHOW
+
+
+class V4L2Backend(CaptureBackend):
+    """Linux Video4Linux2 with MJPG negotiation.
+
+    Uncompressed YUYV at 1920x1080 only reaches about 5 fps over USB 2.0,
+    so MJPG is requested before the frame size (drivers pick the size list
+    from the current pixel format). The driver queue is kept short so
+    read() always returns a fresh frame.
+    """
+
+    name = "v4l2"
+    api = cv2.CAP_V4L2
+
+    def configure(self, capture, mode):
+        mode = dict(mode) if mode else {}
+        width, height = mode.get("width"), mode.get("height")
+        if not width:
+            width, height = MirrorSettings.CAMERA_SIZE
+
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode.get("fourcc", "MJPG")))
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        capture.set(cv2.CAP_PROP_FPS, mode.get("fps", 30))
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, MirrorSettings.capture_buffer_size)
+
+        negotiated = decode_fourcc(capture.get(cv2.CAP_PROP_FOURCC))
+        print(
+            f"V4L2 negotiated {negotiated} "
+            f"{int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))} "
+            f"@{capture.get(cv2.CAP_PROP_FPS):.0f}fps"
+        )
+
+
+class PacedCapture:
+    """Minimal VideoCapture look-alike that paces frames to a frame rate."""
+
+    def __init__(self, width, height, fps):
+        self.width, self.height, self.fps = width, height, fps
+        self.opened = True
+        self._next_time = time.monotonic()
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FOURCC: cv2.VideoWriter_fourcc(*"MJPG"),
+        }.get(prop, 0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = value
+        return True
+
+    def _wait_for_next_frame(self):
+        if self.fps <= 0:
+            return
+        delay = self._next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_time = max(self._next_time + 1.0 / self.fps, time.monotonic())
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        self._wait_for_next_frame()
+        return True, self.next_frame()
+
+    def next_frame(self):
+        raise NotImplementedError
+
+
+class SyntheticCapture(PacedCapture):
+    """Generates a scrolling test pattern with a frame counter."""
+
+    def __init__(self, width, height, fps):
+        super().__init__(width, height, fps)
+        self._pattern = None
+        self._count = 0
+
+    def _build_pattern(self):
+        x = np.linspace(0, 255, self.width, dtype=np.float32)
+        y = np.linspace(0, 255, self.height, dtype=np.float32)[:, None]
+        pattern = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        pattern[:, :, 0] = x
+        pattern[:, :, 1] = y
+        pattern[:, :, 2] = (x + y) / 2
+        self._pattern = pattern
+
+    def next_frame(self):
+        if self._pattern is None or self._pattern.shape[:2] != (self.height, self.width):
+            self._build_pattern()
+        self._count += 1
+        frame = np.roll(self._pattern, self._count * 8, axis=1)
+        cv2.putText(frame, str(self._count), (40, 120), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 6)
+        return frame
+
+
+class FileCapture(PacedCapture):
+    """Replays a video file in a loop at its own frame rate."""
+
+    def __init__(self, path, fps=None):
+        self._video = cv2.VideoCapture(str(path))
+        width = int(self._video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self._video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        super().__init__(width, height, fps if fps is not None else self._video.get(cv2.CAP_PROP_FPS) or 30)
+        self.opened = self._video.isOpened()
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FPS:
+            self.fps = value
+        return True
+
+    def release(self):
+        super().release()
+        self._video.release()
+
+    def next_frame(self):
+        ok, frame = self._video.read()
+        if not ok:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._video.read()
+        return frame if ok else None
+
+    def read(self):
+        ok, frame = super().read()
+        return (ok and frame is not None), frame
+
+
+class SyntheticBackend(CaptureBackend):
+    """Camera-less source for tests and benchmarks.
+
+    Index 0 is the only device. fps=0 delivers frames as fast as they can be
+    generated, which is what benchmarks want.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, fps=30):
+        self.fps = fps
+
+    def open(self, index, mode=None):
+        width, height = MirrorSettings.CAMERA_SIZE
+        if mode:
+            width, height = mode["width"], mode["height"]
+        capture = SyntheticCapture(width, height, self.fps)
+        capture.opened = index == 0
+        return capture
+
+
+class FileBackend(CaptureBackend):
+    """Replays MirrorSettings.capture_file (or a given path) as camera 0."""
+
+    name = "file"
+
+    def __init__(self, path=None, fps=None):
+        self.path = path
+        self.fps = fps
+
+    def open(self, index, mode=None):
+        capture = FileCapture(self.path or MirrorSettings.capture_file, self.fps)
+        capture.opened = capture.opened and index == 0
+        return capture
+
+
+BACKENDS = {
+    "any": CaptureBackend,
+    "dshow": DirectShowBackend,
+    "v4l2": V4L2Backend,
+    "synthetic": SyntheticBackend,
+    "file": FileBackend,
+}
+
+
+def get_backend(name=None):
+    """Return a backend instance; 'auto' picks the platform's native API."""
+    name = name or MirrorSettings.capture_backend
+    if name == "auto":
+        if sys.platform.startswith("win"):
+            name = "dshow"
+        elif sys.platform.startswith("linux"):
+            name = "v4l2"
+        else:
+            name = "any"
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        print(f"Unknown capture backend '{name}', using any")
+        backend_class = CaptureBackend
+    return backend_class()
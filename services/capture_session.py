@@ -0,0 +1,24 @@
+class CaptureSession:
+    """One captured photo, handed from the camera screen to the edit screen.
+
+    image is the BGR frame exactly as the camera delivered it; rotate_cw
+    records that the booth is vertical and the photo must be shown and
+    saved rotated 90 degrees clockwise. The pixels are never rotated up
+    front: the edit screen rotates through texture coordinates, the
+    compositor while copying the frame and the encoder either just before
+    encoding or not at all, when the format stores an EXIF orientation.
+    """
+
+    def __init__(self, photo_id, photo_path, image, rotate_cw=False, started=0.0, shutter_time=0.0):
+        self.photo_id = photo_id
+        self.photo_path = str(photo_path)
+        self.image = image
+        self.rotate_cw = rotate_cw
+        self.started = started
+        self.shutter_time = shutter_time
+
+    @property
+    def size(self):
+        """(width, height) of the photo in the booth orientation."""
+        height, width = self.image.shape[:2]
+        return (height, width) if self.rotate_cw else (width, height)
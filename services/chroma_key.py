@@ -0,0 +1,202 @@
+import threading
+import time
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from config import BACKGROUNDS_DIR, MirrorSettings
+from services.camera_service import FrameBuffer, camera_service
+
+BACKGROUND_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+
+
+def list_backgrounds():
+    """Return the background images in assets/backgrounds, sorted by name."""
+    BACKGROUNDS_DIR.mkdir(parents=True, exist_ok=True)
+    return sorted(path for pattern in BACKGROUND_PATTERNS for path in BACKGROUNDS_DIR.glob(pattern))
+
+
+def selected_background():
+    """Return the configured background, or the first one available."""
+    backgrounds = list_backgrounds()
+    for path in backgrounds:
+        if path.name == MirrorSettings.chroma_background:
+            return path
+    return backgrounds[0] if backgrounds else None
+
+
+@lru_cache(maxsize=8)
+def fitted_background(path, width, height, rotate_ccw=False):
+    """Load a background scaled and centre-cropped to cover width x height.
+
+    Frames are keyed before the booth rotation is applied, so for vertical
+    booths the background is turned counter-clockwise once here and ends up
+    upright in the saved photo. Cached per path, size and orientation.
+    """
+    image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    if image is None:
+        raise FileNotFoundError(path)
+    if rotate_ccw:
+        image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    source_h, source_w = image.shape[:2]
+    scale = max(width / source_w, height / source_h)
+    scaled_w, scaled_h = max(width, round(source_w * scale)), max(height, round(source_h * scale))
+    image = cv2.resize(image, (scaled_w, scaled_h), interpolation=cv2.INTER_AREA)
+    x, y = (scaled_w - width) // 2, (scaled_h - height) // 2
+    return np.ascontiguousarray(image[y:y + height, x:x + width])
+
+
+def chroma_mask(small, hue_range, min_saturation, min_value, feather):
+    """Return the foreground alpha (float32, 0-1) of a small BGR frame."""
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    low = (hue_range[0], min_saturation, min_value)
+    high = (hue_range[1], 255, 255)
+    screen = cv2.inRange(hsv, low, high)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    screen = cv2.morphologyEx(screen, cv2.MORPH_OPEN, kernel)
+    screen = cv2.morphologyEx(screen, cv2.MORPH_CLOSE, kernel)
+    foreground = cv2.bitwise_not(screen)
+    if feather:
+        foreground = cv2.GaussianBlur(foreground, (feather * 2 + 1, feather * 2 + 1), 0)
+    return foreground.astype(np.float32) / 255
+
+
+class ChromaKeyer:
+    """Replaces a green screen behind the guests with a background image.
+
+    The mask is computed in HSV on a copy of the frame scaled down to
+    chroma_mask_edge, cleaned up with a small opening/closing and feathered,
+    then upsampled to full resolution and used to blend the frame over the
+    background. While the scene barely changes (mean absolute difference of
+    the small grey frames below chroma_motion_threshold) the previous
+    full-resolution weights are reused for up to chroma_mask_max_reuse
+    frames, so most frames only pay for the blend.
+    """
+
+    def __init__(self):
+        self.background_path = None
+        self._gray = None
+        self._weights = None
+        self._reused = 0
+        self.masks = 0
+        self.frames = 0
+
+    def process(self, image, path, rotate_ccw=False):
+        """Return image with the green screen replaced by the background at path."""
+        height, width = image.shape[:2]
+        background = fitted_background(str(path), width, height, rotate_ccw)
+        self.frames += 1
+
+        scale = min(1.0, MirrorSettings.chroma_mask_edge / max(width, height))
+        small_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        small = cv2.resize(image, small_size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        if not self._can_reuse(gray, path, (width, height)):
+            alpha = chroma_mask(
+                small, MirrorSettings.chroma_hue, MirrorSettings.chroma_min_saturation,
+                MirrorSettings.chroma_min_value, MirrorSettings.chroma_feather
+            )
+            weights = cv2.resize(alpha, (width, height), interpolation=cv2.INTER_LINEAR)
+            self._weights = (weights, 1.0 - weights)
+            self._gray = gray
+            self.background_path = path
+            self._reused = 0
+            self.masks += 1
+        else:
+            self._reused += 1
+
+        foreground_weights, background_weights = self._weights
+        return cv2.blendLinear(image, background, foreground_weights, background_weights)
+
+    def _can_reuse(self, gray, path, size):
+        if self._weights is None or path != self.background_path:
+            return False
+        if self._weights[0].shape[::-1] != size or self._gray.shape != gray.shape:
+            return False
+        if self._reused >= MirrorSettings.chroma_mask_max_reuse:
+            return False
+        motion = cv2.norm(gray, self._gray, cv2.NORM_L1) / gray.size
+        return motion < MirrorSettings.chroma_motion_threshold
+
+
+class ChromaKeyStage:
+    """Camera source that publishes chroma-keyed copies of another source's frames.
+
+    It exposes the same frames / latest_frame() / acquire() / release()
+    interface as CameraService, so the preview, burst selection and clip
+    recorder use it unchanged. Keying runs on its own thread while at least
+    one user holds it; keyed frames keep the camera timestamps.
+    """
+
+    def __init__(self, source, buffer_size=4):
+        self.source = source
+        self.frames = FrameBuffer(buffer_size)
+        self.keyer = ChromaKeyer()
+        self.process_ms = 0.0
+        self._lock = threading.Lock()
+        self._users = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def acquire(self):
+        """Start keying and the underlying camera."""
+        self.source.acquire()
+        with self._lock:
+            self._users += 1
+            if self._thread is not None and self._thread.is_alive() and not self._stop_event.is_set():
+                return
+            if self._thread is not None:
+                # A thread released a moment ago may still be keying a frame;
+                # two threads would publish into the same buffer.
+                self._thread.join()
+            self.frames.clear()
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stop_event,), name="chroma-key", daemon=True
+            )
+            self._thread.start()
+
+    def release(self):
+        """Stop keying once the last user is gone."""
+        self.source.release()
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0:
+                self._stop_event.set()
+
+    def latest_frame(self):
+        """Return the newest keyed Frame."""
+        return self.frames.latest()
+
+    def _run(self, stop_event):
+        last_seq = 0
+        rotate_ccw = MirrorSettings.orientation == "vertical"
+        path = selected_background()
+        if path is None:
+            print(f"Chroma key: no backgrounds in {BACKGROUNDS_DIR}, showing the camera as is")
+        else:
+            print(f"Chroma key: replacing the green screen with {path.name}")
+        while not stop_event.is_set():
+            frame = self.source.latest_frame()
+            if frame is None or frame.seq == last_seq:
+                time.sleep(0.002)
+                continue
+            last_seq = frame.seq
+            started = time.perf_counter()
+            image = frame.image
+            if path is not None:
+                try:
+                    image = self.keyer.process(frame.image, str(path), rotate_ccw)
+                except Exception as e:
+                    print(f"Chroma key failed, showing the camera as is: {e}")
+                    path = None
+            self.process_ms = (time.perf_counter() - started) * 1000
+            self.frames.publish(image, frame.timestamp)
+        keyer = self.keyer
+        if keyer.frames:
+            print(f"Chroma key: {keyer.masks} masks for {keyer.frames} frames, last frame {self.process_ms:.1f} ms")
+
+
+chroma_key_stage = ChromaKeyStage(camera_service, MirrorSettings.frame_buffer_size)
@@ -0,0 +1,232 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+from kivy.clock import Clock
+
+from config import MirrorSettings
+
+# Output arguments per clip format; input 0 is raw BGR frames on stdin and,
+# for formats in PALETTE_FORMATS, input 1 is a palette image.
+CLIP_FORMATS = {
+    "mp4": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart", "-f", "mp4"],
+    "gif": ["-lavfi", "[0:v][1:v]paletteuse=dither=bayer", "-loop", "0", "-f", "gif"],
+    "webp": ["-c:v", "libwebp", "-quality", "75", "-loop", "0", "-an", "-f", "webp"],
+}
+PALETTE_FORMATS = {"gif"}
+
+
+def clip_frame(image, max_edge, rotate_cw=False):
+    """Downscale a camera frame for a clip and rotate it like stills."""
+    height, width = image.shape[:2]
+    scale = max_edge / max(height, width)
+    if scale < 1:
+        # Even sizes keep yuv420p encoders happy.
+        size = (round(width * scale) // 2 * 2, round(height * scale) // 2 * 2)
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    if rotate_cw:
+        image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+    return image
+
+
+class FfmpegClipWriter:
+    """Streams raw frames into an ffmpeg process as they arrive.
+
+    Frames go straight to ffmpeg's stdin, so memory use does not grow with
+    the clip length. For boomerang clips every frame is also appended to a
+    temporary spool file, which is replayed backwards from disk after the
+    last frame. GIFs use a palette computed from the first frame, since a
+    palette of the whole clip would make ffmpeg hold every frame until the
+    end. ffmpeg's messages go to a temporary file rather than a pipe, so a
+    chatty encoder can never block on it.
+    """
+
+    def __init__(self, path, clip_format, fps, boomerang=False, ffmpeg="ffmpeg"):
+        self.path = Path(path)
+        self.clip_format = clip_format
+        self.fps = fps
+        self.boomerang = boomerang
+        self.ffmpeg = ffmpeg
+        self.frames = 0
+        self.frame_shape = None
+        self._process = None
+        self._spool = None
+        self._log = None
+        self._errors = ""
+        self._tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self._palette_path = self.path.with_name(f".{self.path.name}.palette.png")
+
+    def _make_palette(self, image):
+        height, width = image.shape[:2]
+        command = [
+            self.ffmpeg, "-y", "-loglevel", "error", "-nostats",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-i", "-",
+            "-vf", "palettegen=stats_mode=single", "-frames:v", "1", str(self._palette_path),
+        ]
+        result = subprocess.run(command, input=image.tobytes(), capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg palette failed: {result.stderr.decode(errors='replace').strip()}")
+
+    def _open(self, image):
+        height, width = image.shape[:2]
+        self.frame_shape = image.shape
+        command = [
+            self.ffmpeg, "-y", "-loglevel", "error", "-nostats",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+        ]
+        if self.clip_format in PALETTE_FORMATS:
+            self._make_palette(image)
+            command += ["-i", str(self._palette_path)]
+        command += [*CLIP_FORMATS[self.clip_format], str(self._tmp_path)]
+        self._log = tempfile.TemporaryFile(dir=self.path.parent)
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self._log)
+        if self.boomerang:
+            self._spool = tempfile.TemporaryFile(dir=self.path.parent)
+
+    def write(self, image):
+        """Send one frame to the encoder; every frame must have the same size."""
+        if self._process is None:
+            self._open(image)
+        elif image.shape != self.frame_shape:
+            raise ValueError(f"Frame size changed from {self.frame_shape} to {image.shape}")
+        data = image.tobytes()
+        self._process.stdin.write(data)
+        if self._spool is not None:
+            self._spool.write(data)
+        self.frames += 1
+
+    def _write_reversed(self):
+        frame_bytes = self.frame_shape[0] * self.frame_shape[1] * self.frame_shape[2]
+        # Skip both ends so the loop does not pause on repeated frames.
+        for index in range(self.frames - 2, 0, -1):
+            self._spool.seek(index * frame_bytes)
+            self._process.stdin.write(self._spool.read(frame_bytes))
+
+    def close(self, timeout):
+        """Finish the file within timeout seconds; return its path."""
+        if self._process is None:
+            raise RuntimeError("No frames were recorded")
+        deadline = time.monotonic() + timeout
+        try:
+            if self._spool is not None:
+                self._write_reversed()
+            # communicate() closes stdin itself; closing it first makes it fail.
+            self._process.communicate(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.communicate()
+            self._tmp_path.unlink(missing_ok=True)
+            raise RuntimeError(f"Encoding did not finish within {timeout:.0f}s")
+        finally:
+            self._close_files()
+        if self._process.returncode != 0:
+            self._tmp_path.unlink(missing_ok=True)
+            raise RuntimeError(f"ffmpeg failed: {self._errors}")
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def _close_files(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._log is not None:
+            self._log.seek(0)
+            self._errors = self._log.read().decode(errors="replace").strip()
+            self._log.close()
+            self._log = None
+        self._palette_path.unlink(missing_ok=True)
+
+    def abort(self):
+        """Kill the encoder and drop the partial file."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+        self._close_files()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class ClipRecorder:
+    """Records a short clip from the capture service on a background thread.
+
+    The newest camera frame is sampled at MirrorSettings.clip_fps,
+    downscaled and handed to the encoder right away; nothing but the
+    current frame is kept in memory.
+    on_recorded() fires on the UI thread after the last frame, and
+    on_done(path, error) once the file is finished.
+    """
+
+    def __init__(self, camera):
+        self.camera = camera
+        self._thread = None
+
+    @property
+    def is_recording(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def record(self, path, clip_format="mp4", boomerang=False, on_recorded=None, on_done=None):
+        """Start recording MirrorSettings.clip_seconds of video into path."""
+        if self.is_recording:
+            print("Clip recorder busy")
+            return False
+        ffmpeg = shutil.which(MirrorSettings.ffmpeg_path)
+        if ffmpeg is None:
+            print(f"Cannot record clips: {MirrorSettings.ffmpeg_path} not found")
+            return False
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        writer = FfmpegClipWriter(path, clip_format, MirrorSettings.clip_fps, boomerang, ffmpeg)
+        self._thread = threading.Thread(
+            target=self._run, args=(writer, on_recorded, on_done), name="clip-recorder", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def _run(self, writer, on_recorded, on_done):
+        rotate_cw = MirrorSettings.orientation == "vertical"
+        interval = 1.0 / MirrorSettings.clip_fps
+        started = time.monotonic()
+        end = started + MirrorSettings.clip_seconds
+        next_frame = started
+        last_seq = None
+        scaled = None
+        recorded = False
+        error = None
+        try:
+            while time.monotonic() < end:
+                frame = self.camera.latest_frame()
+                if frame is not None:
+                    # Repeat the last frame if the camera is slower than the
+                    # clip, so playback speed matches real time.
+                    if frame.seq != last_seq:
+                        last_seq = frame.seq
+                        scaled = clip_frame(frame.image, MirrorSettings.clip_max_edge, rotate_cw)
+                    writer.write(scaled)
+                next_frame += interval
+                time.sleep(max(0.0, next_frame - time.monotonic()))
+
+            recorded = True
+            self._dispatch(on_recorded)
+            encode_started = time.monotonic()
+            path = writer.close(MirrorSettings.clip_finish_timeout)
+            print(
+                f"Clip written: {path} ({writer.frames} frames, "
+                f"finished {time.monotonic() - encode_started:.1f}s after the last frame)"
+            )
+        except Exception as e:
+            error = e
+            writer.abort()
+            print(f"Error recording clip {writer.path}: {e}")
+            if not recorded:
+                self._dispatch(on_recorded)
+        self._dispatch(on_done, str(writer.path), error)
+
+    @staticmethod
+    def _dispatch(callback, *args):
+        if callback is not None:
+            Clock.schedule_once(lambda dt: callback(*args), 0)
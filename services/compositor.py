@@ -0,0 +1,150 @@
+import json
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from services.filters import apply_filter, get_filter
+
+# Points are in output image pixels, origin at the top-left corner.
+Stroke = namedtuple("Stroke", ["color", "width", "points"])
+# corners: sticker top-left, top-right and bottom-left mapped to image pixels.
+StickerPlacement = namedtuple("StickerPlacement", ["path", "corners"])
+
+
+class EditDocument:
+    """Resolution-independent description of an edited photo."""
+
+    def __init__(self, photo_path, strokes=None, stickers=None, filter_name="none"):
+        self.photo_path = str(photo_path)
+        self.strokes = strokes or []
+        self.stickers = stickers or []
+        self.filter_name = filter_name
+
+    def to_json(self):
+        return json.dumps({
+            "photo_path": self.photo_path,
+            "strokes": [s._asdict() for s in self.strokes],
+            "stickers": [s._asdict() for s in self.stickers],
+            "filter": self.filter_name,
+        })
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(
+            data["photo_path"],
+            [Stroke(**s) for s in data.get("strokes", [])],
+            [StickerPlacement(**s) for s in data.get("stickers", [])],
+            data.get("filter", "none"),
+        )
+
+
+def read_bgra(path):
+    """Read an image as BGRA, adding an opaque alpha channel if missing."""
+    image = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise FileNotFoundError(path)
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+    elif image.shape[2] == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    return image
+
+
+@lru_cache(maxsize=64)
+def load_sticker(path):
+    """Return a sticker as BGRA, cached across renders."""
+    return read_bgra(path)
+
+
+def draw_stroke(image, stroke):
+    """Draw an anti-aliased polyline with round caps in place."""
+    points = np.asarray(stroke.points, dtype=np.float32).reshape(-1, 2)
+    if not len(points):
+        return
+    b, g, r = (int(round(c * 255)) for c in stroke.color[2::-1])
+    thickness = max(1, int(round(stroke.width)))
+    if len(points) == 1:
+        center = tuple(int(round(v)) for v in points[0])
+        cv2.circle(image, center, max(1, thickness // 2), (b, g, r), -1, cv2.LINE_AA)
+        return
+    cv2.polylines(image, [np.round(points).astype(np.int32)], False, (b, g, r), thickness, cv2.LINE_AA)
+
+
+def blend_sticker(image, placement):
+    """Warp a sticker into its bounding box and alpha-blend it in place."""
+    sticker = load_sticker(placement.path)
+    height, width = sticker.shape[:2]
+    src = np.float32([[0, 0], [width, 0], [0, height]])
+    dst = np.float32(placement.corners)
+
+    top_left, top_right, bottom_left = dst
+    bottom_right = top_right + bottom_left - top_left
+    quad = np.stack([top_left, top_right, bottom_left, bottom_right])
+    x0, y0 = np.floor(quad.min(axis=0)).astype(int)
+    x1, y1 = np.ceil(quad.max(axis=0)).astype(int)
+    x0, y0 = max(x0, 0), max(y0, 0)
+    x1, y1 = min(x1, image.shape[1]), min(y1, image.shape[0])
+    if x1 <= x0 or y1 <= y0:
+        return
+
+    matrix = cv2.getAffineTransform(src, dst - np.float32([x0, y0]))
+    warped = cv2.warpAffine(
+        sticker, matrix, (x1 - x0, y1 - y0),
+        flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_CONSTANT,
+        borderValue=(0, 0, 0, 0)
+    )
+
+    roi = image[y0:y1, x0:x1]
+    alpha = warped[:, :, 3:4].astype(np.uint16)
+    blended = (warped[:, :, :3] * alpha + roi * (255 - alpha) + 127) // 255
+    roi[:] = blended.astype(np.uint8)
+
+
+def render(document, base_image=None, rotate_cw=False):
+    """Render an EditDocument at the original photo's full resolution.
+
+    base_image may be an unrotated camera frame with rotate_cw set; the
+    rotation or the filter then replaces the copy the compositor makes
+    anyway, and base_image is never modified.
+    """
+    if base_image is None:
+        # IMREAD_COLOR applies the EXIF orientation of tagged originals.
+        base_image = cv2.imread(document.photo_path, cv2.IMREAD_COLOR)
+        if base_image is None:
+            raise FileNotFoundError(document.photo_path)
+
+    image = cv2.rotate(base_image, cv2.ROTATE_90_CLOCKWISE) if rotate_cw else base_image
+    # The filter tints only the photo; strokes and stickers stay unfiltered,
+    # as on screen.
+    image = apply_filter(image, get_filter(document.filter_name))
+    if image is base_image:
+        image = base_image.copy()
+    for stroke in document.strokes:
+        draw_stroke(image, stroke)
+    for placement in document.stickers:
+        blend_sticker(image, placement)
+    return image
+
+
+if __name__ == "__main__":
+    from config import MirrorSettings
+    from services.encoders import get_encoder
+    from services.fileio import write_atomic
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m services.compositor <edit.json> [...]")
+        sys.exit(1)
+
+    encoder = get_encoder(MirrorSettings.output_preset)
+    for document_path in sys.argv[1:]:
+        document = EditDocument.from_json(Path(document_path).read_text())
+        photo_path = Path(document.photo_path)
+        output_path = photo_path.parent / f"{photo_path.stem}_edited{encoder.extension}"
+        write_atomic(output_path, encoder.encode(render(document)).data)
+        print(f"Rendered {output_path}")
@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from config import DERIVATIVES_DIR, PHOTOS_DIR, MirrorSettings
+from services.fileio import write_atomic
+from services.id_allocator import PHOTO_ID_PATTERN
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def derivative_path(source_path, size_name, out_dir=DERIVATIVES_DIR):
+    """Return where the size_name version of source_path is stored."""
+    return Path(out_dir) / size_name / f"{Path(source_path).stem}.jpg"
+
+
+def lower_priority():
+    """Pool initializer: run workers below normal priority, single-threaded."""
+    import cv2
+
+    cv2.setNumThreads(1)
+    try:
+        if hasattr(os, "nice"):
+            os.nice(10)
+        else:
+            import ctypes
+            below_normal = 0x4000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), below_normal)
+    except Exception as e:
+        print(f"Could not lower derivative worker priority: {e}")
+
+
+def make_derivatives(source_path, sizes, out_dir=DERIVATIVES_DIR, quality=85):
+    """Write every missing or stale size of one photo; return how many.
+
+    sizes maps a name to the longest edge in pixels. The photo is decoded
+    once and each size is resized with INTER_AREA from the previous, larger
+    one. Existing outputs newer than the source are left alone, so the
+    function is safe to re-run after an interruption.
+    """
+    import cv2
+
+    source_path = Path(source_path)
+    source_mtime = source_path.stat().st_mtime_ns
+    todo = []
+    for name, edge in sorted(sizes.items(), key=lambda item: -item[1]):
+        target = derivative_path(source_path, name, out_dir)
+        if target.exists() and target.stat().st_mtime_ns >= source_mtime:
+            continue
+        todo.append((target, edge))
+    if not todo:
+        return 0
+
+    image = cv2.imread(str(source_path), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Could not decode {source_path}")
+
+    for target, edge in todo:
+        height, width = image.shape[:2]
+        scale = edge / max(height, width)
+        if scale < 1:
+            new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError(f"Could not encode {target}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(target, buffer.tobytes())
+    return len(todo)
+
+
+def make_derivatives_safe(source_path, sizes):
+    """make_derivatives for pool.map: return the exception instead of raising."""
+    try:
+        return make_derivatives(source_path, sizes)
+    except Exception as e:
+        return e
+
+
+def gallery_photos(photos_dir=PHOTOS_DIR):
+    """Yield original and edited photos in the gallery folder."""
+    with os.scandir(photos_dir) as entries:
+        for entry in entries:
+            if (PHOTO_ID_PATTERN.match(entry.name) and entry.is_file()
+                    and Path(entry.name).suffix.lower() in IMAGE_EXTENSIONS):
+                yield entry.path
+
+
+class DerivativeService:
+    """Generates thumbnails and previews in a low-priority process pool.
+
+    New photos are submitted as the writer saves them; backfill() processes
+    a whole gallery. Both go through make_derivatives, which skips work that
+    is already done, so a killed run simply resumes on the next backfill.
+    """
+
+    def __init__(self, sizes, workers=None):
+        self.sizes = dict(sizes)
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=lower_priority)
+            return self._pool
+
+    def submit(self, source_path):
+        """Queue derivative generation for one newly saved photo."""
+        future = self._executor().submit(make_derivatives, str(source_path), self.sizes)
+        future.add_done_callback(lambda f: self._report(source_path, f))
+        return future
+
+    @staticmethod
+    def _report(source_path, future):
+        error = future.exception()
+        if error is not None:
+            print(f"Error creating derivatives for {source_path}: {error}")
+
+    def backfill(self, photos_dir=PHOTOS_DIR):
+        """Create missing derivatives for a gallery; return (images, seconds)."""
+        started = time.perf_counter()
+        executor = self._executor()
+        paths = list(gallery_photos(photos_dir))
+        generated = 0
+        for path, result in zip(paths, executor.map(make_derivatives_safe, paths, repeat(self.sizes), chunksize=8)):
+            if isinstance(result, Exception):
+                print(f"Error creating derivatives for {path}: {result}")
+            elif result:
+                generated += 1
+        elapsed = time.perf_counter() - started
+        rate = generated / elapsed if elapsed > 0 else 0.0
+        print(f"Derivatives: {generated}/{len(paths)} photos updated in {elapsed:.1f}s ({rate:.1f} images/s)")
+        return generated, elapsed
+
+    def shutdown(self, wait=False):
+        """Stop the pool; queued work is dropped unless wait is true."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=not wait)
+                self._pool = None
+
+
+derivative_service = DerivativeService(MirrorSettings.derivative_sizes)
+
+
+if __name__ == "__main__":
+    if "--backfill" not in sys.argv:
+        print("Usage: python -m services.derivatives --backfill [--workers N]")
+        sys.exit(1)
+
+    if "--workers" in sys.argv:
+        derivative_service.workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    derivative_service.backfill()
+    derivative_service.shutdown()
@@ -0,0 +1,229 @@
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+EncodeResult = namedtuple("EncodeResult", ["data", "encoder", "seconds", "size_bytes"])
+
+# EXIF orientation value meaning "rotate 90 degrees clockwise to display".
+EXIF_ROTATE_CW = 6
+
+
+def exif_orientation_tiff(orientation):
+    """Return a minimal little-endian TIFF block holding only the Orientation tag."""
+    entry = struct.pack("<HHIH2x", 0x0112, 3, 1, orientation)
+    return b"II*\x00" + struct.pack("<IH", 8, 1) + entry + struct.pack("<I", 0)
+
+
+def jpeg_with_orientation(data, orientation):
+    """Insert an EXIF APP1 segment with orientation into JPEG data."""
+    if data[:2] != b"\xff\xd8":
+        raise ValueError("Not a JPEG stream")
+    payload = b"Exif\x00\x00" + exif_orientation_tiff(orientation)
+    segment = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    # Keep the JFIF APP0 header first when the encoder wrote one.
+    position = 2
+    if data[2:4] == b"\xff\xe0":
+        position = 4 + struct.unpack(">H", data[4:6])[0]
+    return data[:position] + segment + data[position:]
+
+
+def webp_with_orientation(data, orientation, width, height, alpha=False):
+    """Add an EXIF chunk with orientation to WebP data, upgrading to VP8X if needed."""
+    if data[:4] != b"RIFF" or data[8:12] != b"WEBP":
+        raise ValueError("Not a WebP stream")
+    chunks = data[12:]
+    if chunks[:4] == b"VP8X":
+        flags = chunks[8] | 0x08
+        chunks = chunks[:8] + bytes([flags]) + chunks[9:]
+    else:
+        flags = 0x08 | (0x10 if alpha else 0)
+        header = bytes([flags, 0, 0, 0]) + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+        chunks = b"VP8X" + struct.pack("<I", len(header)) + header + chunks
+    tiff = exif_orientation_tiff(orientation)
+    chunks += b"EXIF" + struct.pack("<I", len(tiff)) + tiff + b"\x00" * (len(tiff) % 2)
+    return b"RIFF" + struct.pack("<I", len(chunks) + 4) + b"WEBP" + chunks
+
+
+class EncoderStats:
+    """Running totals of encode time and output size per encoder."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, result):
+        with self._lock:
+            count, seconds, size_bytes = self._totals.get(result.encoder, (0, 0.0, 0))
+            self._totals[result.encoder] = (count + 1, seconds + result.seconds, size_bytes + result.size_bytes)
+
+    def summary(self):
+        """Return {encoder: (count, avg_ms, avg_kb)}."""
+        with self._lock:
+            return {
+                name: (count, seconds / count * 1000, size_bytes / count / 1024)
+                for name, (count, seconds, size_bytes) in self._totals.items()
+            }
+
+
+encoder_stats = EncoderStats()
+
+
+class Encoder:
+    """Base class for image encoders built on cv2.imencode."""
+
+    name = ""
+    extension = ""
+    supports_alpha = False
+    supports_exif = False
+
+    def params(self):
+        """Return the cv2.imencode parameter list."""
+        return []
+
+    def add_orientation(self, data, orientation, image):
+        """Tag encoded data with an EXIF orientation; needs supports_exif."""
+        raise NotImplementedError(f"{self.name} cannot store an EXIF orientation")
+
+    def encode(self, image):
+        """Encode a BGR/BGRA image and record its time and size in encoder_stats."""
+        if image.ndim == 3 and image.shape[2] == 4 and not self.supports_alpha:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+        started = time.perf_counter()
+        ok, buffer = cv2.imencode(self.extension, image, self.params())
+        seconds = time.perf_counter() - started
+        if not ok:
+            raise ValueError(f"Could not encode image with {self.name}")
+
+        result = EncodeResult(buffer.tobytes(), self.name, seconds, buffer.size)
+        encoder_stats.record(result)
+        return result
+
+
+class JpegEncoder(Encoder):
+    """JPEG via OpenCV's bundled libjpeg-turbo.
+
+    fast=True keeps the cheapest settings (4:2:0 chroma, no Huffman
+    optimisation, baseline); OpenCV does not expose the DCT method, so this
+    is the closest speed knob it offers.
+    """
+
+    extension = ".jpg"
+    supports_exif = True
+
+    def __init__(self, quality=90, fast=True, progressive=False):
+        self.quality = quality
+        self.fast = fast
+        self.progressive = progressive
+        self.name = f"jpeg_q{quality}{'_fast' if fast else ''}"
+
+    def params(self):
+        params = [
+            cv2.IMWRITE_JPEG_QUALITY, self.quality,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0 if self.fast else 1,
+            cv2.IMWRITE_JPEG_PROGRESSIVE, 1 if self.progressive and not self.fast else 0,
+        ]
+        if self.fast and hasattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR"):
+            params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420]
+        return params
+
+    def add_orientation(self, data, orientation, image):
+        return jpeg_with_orientation(data, orientation)
+
+
+class WebpEncoder(Encoder):
+    """WebP; a quality above 100 selects lossless mode."""
+
+    extension = ".webp"
+    supports_alpha = True
+    supports_exif = True
+
+    def __init__(self, quality=85):
+        self.quality = quality
+        self.name = "webp_lossless" if quality > 100 else f"webp_q{quality}"
+
+    def params(self):
+        return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+
+    def add_orientation(self, data, orientation, image):
+        height, width = image.shape[:2]
+        alpha = image.ndim == 3 and image.shape[2] == 4
+        return webp_with_orientation(data, orientation, width, height, alpha)
+
+
+class PngEncoder(Encoder):
+    """Lossless PNG with a configurable zlib compression level (0-9)."""
+
+    extension = ".png"
+    supports_alpha = True
+
+    def __init__(self, compression=3):
+        self.compression = compression
+        self.name = f"png_c{compression}"
+
+    def params(self):
+        return [cv2.IMWRITE_PNG_COMPRESSION, self.compression]
+
+
+PRESETS = {
+    "jpeg_fast": JpegEncoder(quality=85, fast=True),
+    "jpeg_quality": JpegEncoder(quality=95, fast=False),
+    "webp": WebpEncoder(quality=85),
+    "webp_lossless": WebpEncoder(quality=101),
+    "png_fast": PngEncoder(compression=1),
+    "png_small": PngEncoder(compression=6),
+}
+
+
+def get_encoder(preset):
+    """Return the encoder for a preset name, falling back to PNG."""
+    encoder = PRESETS.get(preset)
+    if encoder is None:
+        print(f"Unknown encoder preset '{preset}', using png_fast")
+        encoder = PRESETS["png_fast"]
+    return encoder
+
+
+def encode_frame(frame, encoder, rotate_cw=False, exif_formats=()):
+    """Encode a BGR frame in the booth orientation.
+
+    For vertical setups the frame is rotated once, just before encoding,
+    unless the encoder's extension is in exif_formats: then the pixels are
+    stored as captured and tagged with an EXIF orientation instead.
+    """
+    if rotate_cw and encoder.supports_exif and encoder.extension in exif_formats:
+        return encoder.add_orientation(encoder.encode(frame).data, EXIF_ROTATE_CW, frame)
+    if rotate_cw:
+        frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    return encoder.encode(frame).data
+
+
+def benchmark_presets(image, repeats=3):
+    """Encode image with every preset and return {preset: (avg_ms, kb)}."""
+    results = {}
+    for preset, encoder in PRESETS.items():
+        timings = []
+        for _ in range(repeats):
+            result = encoder.encode(image)
+            timings.append(result.seconds)
+        results[preset] = (sum(timings) / len(timings) * 1000, result.size_bytes / 1024)
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m services.encoders <image>")
+        sys.exit(1)
+
+    sample = cv2.imread(sys.argv[1])
+    if sample is None:
+        print(f"Could not read {sys.argv[1]}")
+        sys.exit(1)
+
+    print(f"{'preset':<15}{'ms':>10}{'KB':>10}")
+    for preset, (ms, kb) in benchmark_presets(sample).items():
+        print(f"{preset:<15}{ms:>10.1f}{kb:>10.0f}")
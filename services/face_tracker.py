@@ -0,0 +1,171 @@
+import threading
+import time
+
+import cv2
+
+from config import MODELS_DIR, MirrorSettings
+from services.camera_service import camera_service
+from services.frame_selection import luma
+
+
+def create_face_detector(max_edge):
+    """Return (name, detect) where detect(image) lists faces as normalized (x, y, w, h).
+
+    Uses OpenCV's YuNet DNN detector when its model is present in
+    assets/models, otherwise the bundled Haar frontal face cascade. Either
+    runs on a grayscale or colour copy scaled down to max_edge.
+    """
+    model_path = MODELS_DIR / MirrorSettings.face_model
+    if model_path.exists() and hasattr(cv2, "FaceDetectorYN"):
+        detector = cv2.FaceDetectorYN.create(str(model_path), "", (max_edge, max_edge), 0.8)
+
+        def detect_dnn(image):
+            height, width = image.shape[:2]
+            scale = min(1.0, max_edge / max(width, height))
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            small = cv2.resize(image, size, interpolation=cv2.INTER_AREA) if scale < 1 else image
+            detector.setInputSize(size)
+            _, faces = detector.detect(small)
+            if faces is None:
+                return []
+            return [(x / size[0], y / size[1], w / size[0], h / size[1]) for x, y, w, h in faces[:, :4]]
+
+        return "yunet", detect_dnn
+
+    # A private instance: cascades must not be shared with the burst scorer's thread.
+    cascade = cv2.CascadeClassifier(str(cv2.data.haarcascades + "haarcascade_frontalface_default.xml"))
+
+    def detect_haar(image):
+        gray = luma(image, max_edge)
+        height, width = gray.shape
+        min_side = max(20, min(width, height) // 12)
+        faces = cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=5, minSize=(min_side, min_side))
+        return [(x / width, y / height, w / width, h / height) for x, y, w, h in faces]
+
+    return "haar", detect_haar
+
+
+class FaceTracker:
+    """Watches a camera source for faces on a decimated background stream.
+
+    While at least one user holds it, a worker thread runs the detector on
+    the newest frame, at most face_detect_fps times a second and never more
+    than face_detect_duty of the wall-clock time, so a slow detector only
+    lowers the detection rate and never starves the preview. Faces are kept
+    in normalized coordinates of the unrotated camera frame.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.faces = []
+        self.present_since = None
+        self.last_seen = 0.0
+        self.detect_ms = 0.0
+        self.detector_name = ""
+        self._lock = threading.Lock()
+        self._users = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def acquire(self):
+        """Start detecting (and the camera) until the matching release()."""
+        self.source.acquire()
+        with self._lock:
+            self._users += 1
+            if self._thread is None or not self._thread.is_alive():
+                self.faces = []
+                self.present_since = None
+                self._stop_event = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._stop_event,), name="face-tracker", daemon=True
+                )
+                self._thread.start()
+
+    def release(self):
+        """Stop detecting once the last user is gone."""
+        self.source.release()
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0:
+                self._stop_event.set()
+                self._thread = None
+
+    def present_for(self):
+        """Seconds faces have been in view without interruption, 0 if none."""
+        with self._lock:
+            since = self.present_since
+        return time.monotonic() - since if since is not None else 0.0
+
+    def centered(self, margin=None):
+        """True if faces are in view and every face centre is inside the margin."""
+        margin = MirrorSettings.face_center_margin if margin is None else margin
+        with self._lock:
+            faces = list(self.faces)
+        if not faces:
+            return False
+        return all(
+            margin <= x + w / 2 <= 1 - margin and margin <= y + h / 2 <= 1 - margin
+            for x, y, w, h in faces
+        )
+
+    def suggest_crop(self, width, height):
+        """Return a (x0, y0, x1, y1) pixel crop keeping every face, or None.
+
+        The crop has the frame's aspect ratio, is padded around the faces
+        (more below them, for shoulders) and never smaller than
+        auto_framing_min_scale of the frame.
+        """
+        with self._lock:
+            faces = list(self.faces)
+        if not faces:
+            return None
+        pad = MirrorSettings.auto_framing_padding
+        left = min(x - pad * w for x, y, w, h in faces)
+        right = max(x + w + pad * w for x, y, w, h in faces)
+        top = min(y - pad * h for x, y, w, h in faces)
+        bottom = max(y + h + 2 * pad * h for x, y, w, h in faces)
+        # Equal normalized sides keep the frame's aspect ratio.
+        side = min(1.0, max(right - left, bottom - top, MirrorSettings.auto_framing_min_scale))
+        x0 = min(max(0.0, (left + right - side) / 2), 1 - side)
+        y0 = min(max(0.0, (top + bottom - side) / 2), 1 - side)
+        return (
+            round(x0 * width), round(y0 * height),
+            round((x0 + side) * width), round((y0 + side) * height)
+        )
+
+    def _update(self, faces):
+        now = time.monotonic()
+        with self._lock:
+            self.faces = faces
+            if faces:
+                self.last_seen = now
+                if self.present_since is None:
+                    self.present_since = now
+            elif now - self.last_seen > MirrorSettings.face_lost_grace:
+                self.present_since = None
+
+    def _run(self, stop_event):
+        self.detector_name, detect = create_face_detector(MirrorSettings.face_detect_edge)
+        print(f"Face tracker: {self.detector_name} detector")
+        min_interval = 1.0 / MirrorSettings.face_detect_fps
+        duty = min(1.0, max(0.01, MirrorSettings.face_detect_duty))
+        last_seq = 0
+        while not stop_event.is_set():
+            frame = self.source.latest_frame()
+            if frame is None or frame.seq == last_seq:
+                stop_event.wait(0.01)
+                continue
+            last_seq = frame.seq
+            started = time.perf_counter()
+            try:
+                faces = detect(frame.image)
+            except cv2.error as e:
+                print(f"Face detection failed: {e}")
+                faces = []
+            elapsed = time.perf_counter() - started
+            self.detect_ms = elapsed * 1000
+            self._update(faces)
+            stop_event.wait(max(min_interval - elapsed, elapsed * (1 / duty - 1)))
+
+
+face_tracker = FaceTracker(camera_service)
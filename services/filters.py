@@ -0,0 +1,80 @@
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# A filter is a 3x3 RGB colour mix followed by a per-channel tone curve.
+# mix rows give the output R, G and B as weights of the input RGB; curve is
+# a (256, 3) uint8 lookup table in RGB order. The same definition feeds the
+# GLSL shader on screen and the cv2 path that renders the saved photo.
+LutFilter = namedtuple("LutFilter", ["name", "label", "mix", "curve"])
+
+IDENTITY_MIX = np.eye(3, dtype=np.float32)
+RAMP = np.arange(256, dtype=np.float32)
+
+
+def curve(red=RAMP, green=RAMP, blue=RAMP):
+    """Build a (256, 3) RGB lookup table from per-channel value arrays."""
+    return np.clip(np.round(np.stack([red, green, blue], axis=1)), 0, 255).astype(np.uint8)
+
+
+def s_curve(strength):
+    """Logistic contrast curve through mid-grey, scaled to hit 0 and 255."""
+    raw = 1 / (1 + np.exp(-(RAMP - 127.5) / strength))
+    return (raw - raw[0]) / (raw[-1] - raw[0]) * 255
+
+
+FILTERS = {
+    "none": LutFilter("none", "Normal", IDENTITY_MIX, curve()),
+    "bw": LutFilter(
+        "bw", "B/N",
+        np.float32([[0.299, 0.587, 0.114]] * 3),
+        curve(*[s_curve(60)] * 3)
+    ),
+    "sepia": LutFilter(
+        "sepia", "Sepia",
+        np.float32([[0.393, 0.769, 0.189], [0.349, 0.686, 0.168], [0.272, 0.534, 0.131]]),
+        curve()
+    ),
+    "warm": LutFilter(
+        "warm", "Cálido",
+        IDENTITY_MIX,
+        curve(RAMP * 1.06 + 6, RAMP * 1.01 + 2, RAMP * 0.88)
+    ),
+    "contrast": LutFilter("contrast", "Contraste", IDENTITY_MIX, curve(*[s_curve(32)] * 3)),
+}
+
+
+def get_filter(name):
+    """Return the filter called name, falling back to no filter."""
+    lut_filter = FILTERS.get(name or "none")
+    if lut_filter is None:
+        print(f"Unknown filter '{name}', using none")
+        lut_filter = FILTERS["none"]
+    return lut_filter
+
+
+def apply_filter(image, lut_filter):
+    """Apply lut_filter to a BGR image with cv2.transform and cv2.LUT.
+
+    Returns a new image, or image itself for steps that are identities.
+    Rounding matches the shader: the mix is rounded to 8 bits before the
+    curve lookup.
+    """
+    if not np.array_equal(lut_filter.mix, IDENTITY_MIX):
+        # Reverse rows and columns to turn the RGB matrix into a BGR one.
+        image = cv2.transform(image, np.ascontiguousarray(lut_filter.mix[::-1, ::-1]))
+    if not np.array_equal(lut_filter.curve, FILTERS["none"].curve):
+        table = np.ascontiguousarray(lut_filter.curve[:, ::-1]).reshape(1, 256, 3)
+        image = cv2.LUT(image, table)
+    return image
+
+
+def shader_reference(image, lut_filter):
+    """Emulate the fragment shader in floating point, for agreement checks."""
+    rgb = image[:, :, ::-1].astype(np.float32) / 255
+    mixed = np.clip(rgb @ lut_filter.mix.T, 0, 1)
+    # Texel lookup at mixed * 255/256 + 0.5/256 with nearest filtering.
+    index = np.clip(np.floor(mixed * 255 + 0.5), 0, 255).astype(np.intp)
+    out = np.stack([lut_filter.curve[index[:, :, c], c] for c in range(3)], axis=2)
+    return np.ascontiguousarray(out[:, :, ::-1])
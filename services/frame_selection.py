@@ -0,0 +1,127 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import cv2
+import numpy as np
+from kivy.clock import Clock
+
+from config import MirrorSettings
+
+
+def burst_frames(frames, shutter_time, count, window):
+    """Return up to count frames within window seconds around shutter_time.
+
+    Frames are ordered by distance to the shutter moment, closest first.
+    """
+    candidates = [f for f in frames if abs(f.timestamp - shutter_time) <= window / 2]
+    candidates.sort(key=lambda f: abs(f.timestamp - shutter_time))
+    return candidates[:count]
+
+
+def luma(image, max_edge):
+    """Return the image as grayscale, downscaled so its longest edge is max_edge."""
+    height, width = image.shape[:2]
+    scale = max_edge / max(height, width)
+    if scale < 1:
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def sharpness(gray):
+    """Variance of the Laplacian: higher means more in-focus edges."""
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+@lru_cache(maxsize=None)
+def load_cascade(name):
+    return cv2.CascadeClassifier(str(cv2.data.haarcascades + name))
+
+
+def eyes_open(gray):
+    """Fraction of expected eyes found on detected faces, or None without faces.
+
+    The Haar eye cascade rarely fires on closed eyes, so a frame where
+    somebody blinks scores lower than one where everybody's eyes are open.
+    """
+    faces = load_cascade("haarcascade_frontalface_default.xml").detectMultiScale(
+        gray, scaleFactor=1.2, minNeighbors=5, minSize=(40, 40)
+    )
+    if len(faces) == 0:
+        return None
+    eye_cascade = load_cascade("haarcascade_eye.xml")
+    found = 0
+    for x, y, w, h in faces:
+        upper_face = gray[y:y + h // 2, x:x + w]
+        eyes = eye_cascade.detectMultiScale(upper_face, scaleFactor=1.1, minNeighbors=4)
+        found += min(len(eyes), 2)
+    return found / (2 * len(faces))
+
+
+def pick_best(frames, blink=True, max_edge=480, budget=0.15):
+    """Score frames and return (best_index, scores, seconds).
+
+    Frames are scored in order until the time budget runs out, so pass the
+    most promising ones first. Each score is a dict with "sharpness" and
+    "eyes"; eyes is None when no face was found or blink detection is off.
+    Open eyes weigh more than sharpness, which is normalised to the
+    sharpest frame in the burst.
+    """
+    started = time.perf_counter()
+    scores = []
+    for frame in frames:
+        if scores and time.perf_counter() - started > budget:
+            break
+        gray = luma(frame.image, max_edge)
+        scores.append({
+            "sharpness": sharpness(gray),
+            "eyes": eyes_open(gray) if blink else None,
+        })
+
+    sharpest = max(s["sharpness"] for s in scores) or 1.0
+    totals = np.array([
+        s["sharpness"] / sharpest + 2.0 * (s["eyes"] if s["eyes"] is not None else 0.0)
+        for s in scores
+    ])
+    return int(totals.argmax()), scores, time.perf_counter() - started
+
+
+class FrameSelector:
+    """Scores burst frames on a worker thread and reports the best one.
+
+    OpenCV releases the GIL while it works, so scoring does not stall the
+    UI thread. The callback runs on the Kivy main thread via Clock.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-selector")
+
+    def submit(self, frames, shutter_time, on_done):
+        """Pick the best of frames and call on_done(frame) on the UI thread."""
+        future = self._executor.submit(
+            pick_best, frames, MirrorSettings.burst_blink_detection,
+            MirrorSettings.burst_score_edge, MirrorSettings.burst_score_budget
+        )
+        future.add_done_callback(lambda f: self._report(f, frames, shutter_time, on_done))
+        return future
+
+    @staticmethod
+    def _report(future, frames, shutter_time, on_done):
+        try:
+            index, scores, seconds = future.result()
+        except Exception as e:
+            print(f"Burst scoring failed, keeping the frame closest to the shutter: {e}")
+            index = 0
+        else:
+            best = frames[index]
+            print(
+                f"Burst: picked frame {index + 1}/{len(frames)} (seq {best.seq}, "
+                f"{(best.timestamp - shutter_time) * 1000:+.0f} ms) in {seconds * 1000:.0f} ms"
+            )
+            for i, (frame, score) in enumerate(zip(frames, scores)):
+                eyes = "-" if score["eyes"] is None else f"{score['eyes']:.2f}"
+                print(f"  {i + 1}: seq {frame.seq} sharpness {score['sharpness']:.1f} eyes {eyes}")
+        Clock.schedule_once(lambda dt: on_done(frames[index]), 0)
+
+
+frame_selector = FrameSelector()
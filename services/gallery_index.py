@@ -0,0 +1,241 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from config import GALLERY_DB, PHOTOS_DIR
+from services.id_allocator import PHOTO_ID_PATTERN
+
+EDITED_SUFFIX = "_edited"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS photos (
+    id INTEGER PRIMARY KEY,
+    captured_at REAL NOT NULL,
+    original_path TEXT,
+    original_mtime_ns INTEGER,
+    original_inode INTEGER,
+    original_bytes INTEGER,
+    edited_path TEXT,
+    edited_mtime_ns INTEGER,
+    edited_inode INTEGER,
+    edited_bytes INTEGER,
+    width INTEGER,
+    height INTEGER,
+    encoder TEXT,
+    session_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS photos_captured_at ON photos (captured_at, id);
+CREATE TABLE IF NOT EXISTS scan_state (key TEXT PRIMARY KEY, value INTEGER);
+"""
+
+
+class GalleryIndex:
+    """SQLite index of the gallery folder, kept in WAL mode.
+
+    The app records every original and edited photo as it is written.
+    reconcile() picks up files added or removed outside the app: it skips
+    the scan while the folder mtime is unchanged and otherwise compares one
+    scandir pass against the stored mtime/inode of each file.
+    """
+
+    def __init__(self, db_path, photos_dir):
+        self.db_path = Path(db_path)
+        self.photos_dir = Path(photos_dir)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _stat(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_ino
+
+    def record_original(self, photo_id, path, width, height, encoder, size_bytes, captured_at=None):
+        """Insert or update the original capture of a photo."""
+        mtime_ns, inode = self._stat(path)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO photos (id, captured_at, original_path, original_mtime_ns, original_inode,
+                                        original_bytes, width, height, encoder)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        original_path = excluded.original_path,
+                        original_mtime_ns = excluded.original_mtime_ns,
+                        original_inode = excluded.original_inode,
+                        original_bytes = excluded.original_bytes,
+                        width = excluded.width,
+                        height = excluded.height,
+                        encoder = excluded.encoder
+                    """,
+                    (photo_id, captured_at or time.time(), str(path), mtime_ns, inode,
+                     size_bytes, width, height, encoder)
+                )
+
+    def record_edited(self, photo_id, path, size_bytes, session_seconds=None):
+        """Attach the edited version of a photo."""
+        mtime_ns, inode = self._stat(path)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO photos (id, captured_at, edited_path, edited_mtime_ns, edited_inode,
+                                        edited_bytes, session_seconds)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        edited_path = excluded.edited_path,
+                        edited_mtime_ns = excluded.edited_mtime_ns,
+                        edited_inode = excluded.edited_inode,
+                        edited_bytes = excluded.edited_bytes,
+                        session_seconds = excluded.session_seconds
+                    """,
+                    (photo_id, time.time(), str(path), mtime_ns, inode, size_bytes, session_seconds)
+                )
+
+    def get(self, photo_id):
+        """Return one photo row as a dict, or None."""
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM photos WHERE id = ?", (photo_id,)).fetchone()
+        return dict(row) if row else None
+
+    def page_by_id(self, after_id=0, limit=100):
+        """Return up to limit photos with id greater than after_id."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT * FROM photos WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def page_by_time(self, start, end, after=None, limit=100):
+        """Return photos captured in [start, end), ordered by time.
+
+        after is the (captured_at, id) of the last row of the previous page.
+        """
+        after_time, after_id = after or (start, -1)
+        with self._lock:
+            rows = self._connection().execute(
+                """
+                SELECT * FROM photos
+                WHERE captured_at < ? AND (captured_at, id) > (?, ?)
+                ORDER BY captured_at, id LIMIT ?
+                """,
+                (end, after_time, after_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _state(self, conn, key):
+        row = conn.execute("SELECT value FROM scan_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _scan_folder(self):
+        """Return {photo_id: {"original"|"edited": (path, mtime_ns, inode, size, mtime)}}."""
+        found = {}
+        with os.scandir(self.photos_dir) as entries:
+            for entry in entries:
+                match = PHOTO_ID_PATTERN.match(entry.name)
+                if not match or not entry.is_file():
+                    continue
+                stem = entry.name.rsplit(".", 1)[0]
+                kind = "edited" if stem.endswith(EDITED_SUFFIX) else "original"
+                st = entry.stat()
+                found.setdefault(int(match.group(1)), {})[kind] = (
+                    entry.path, st.st_mtime_ns, entry.inode(), st.st_size, st.st_mtime
+                )
+        return found
+
+    def reconcile(self, force=False):
+        """Sync the index with the folder; return (added, updated, removed)."""
+        folder_mtime = os.stat(self.photos_dir).st_mtime_ns
+        with self._lock:
+            conn = self._connection()
+            if not force and self._state(conn, "folder_mtime_ns") == folder_mtime:
+                return 0, 0, 0
+
+            on_disk = self._scan_folder()
+            rows = {
+                row["id"]: row for row in conn.execute(
+                    "SELECT id, original_path, original_mtime_ns, original_inode, "
+                    "edited_path, edited_mtime_ns, edited_inode FROM photos"
+                )
+            }
+
+            added = updated = 0
+            with conn:
+                for photo_id, files in on_disk.items():
+                    original = files.get("original")
+                    edited = files.get("edited")
+                    values = (
+                        *(original[:4] if original else (None,) * 4),
+                        *(edited[:4] if edited else (None,) * 4),
+                    )
+                    row = rows.get(photo_id)
+                    if row is None:
+                        captured_at = (original or edited)[4]
+                        conn.execute(
+                            """
+                            INSERT INTO photos (id, captured_at,
+                                original_path, original_mtime_ns, original_inode, original_bytes,
+                                edited_path, edited_mtime_ns, edited_inode, edited_bytes)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            """,
+                            (photo_id, captured_at, *values)
+                        )
+                        added += 1
+                    elif self._changed(row, "original", original) or self._changed(row, "edited", edited):
+                        conn.execute(
+                            """
+                            UPDATE photos SET
+                                original_path = ?, original_mtime_ns = ?, original_inode = ?, original_bytes = ?,
+                                edited_path = ?, edited_mtime_ns = ?, edited_inode = ?, edited_bytes = ?
+                            WHERE id = ?
+                            """,
+                            (*values, photo_id)
+                        )
+                        updated += 1
+
+                missing = [(photo_id,) for photo_id in rows.keys() - on_disk.keys()]
+                conn.executemany("DELETE FROM photos WHERE id = ?", missing)
+                conn.execute(
+                    "INSERT OR REPLACE INTO scan_state (key, value) VALUES ('folder_mtime_ns', ?)",
+                    (folder_mtime,)
+                )
+
+        return added, updated, len(missing)
+
+    @staticmethod
+    def _changed(row, kind, found):
+        if found is None:
+            return row[f"{kind}_path"] is not None
+        path, mtime_ns, inode = found[:3]
+        return (row[f"{kind}_path"], row[f"{kind}_mtime_ns"], row[f"{kind}_inode"]) != (path, mtime_ns, inode)
+
+
+gallery_index = GalleryIndex(GALLERY_DB, PHOTOS_DIR)
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    added, updated, removed = gallery_index.reconcile(force="--force" in sys.argv)
+    print(f"Gallery index: +{added} ~{updated} -{removed} in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,78 @@
+import re
+import threading
+import time
+from pathlib import Path
+
+from services.fileio import write_atomic, FileLock
+
+PHOTO_ID_PATTERN = re.compile(r"^photo_(\d+)")
+# Photos and clips draw their IDs from the same counter.
+GALLERY_ID_PATTERN = re.compile(r"^(?:photo|clip)_(\d+)")
+
+
+class IdAllocator:
+    """Hands out unique photo IDs backed by a crash-safe counter file.
+
+    The counter file stores the highest ID reserved so far and is replaced
+    atomically. IDs are reserved in blocks under an inter-process lock, so
+    booths sharing a counter never hand out the same ID and most captures
+    need no disk access. IDs left in a block when the app stops are skipped,
+    never reused. A missing or corrupt counter is rebuilt from the highest
+    ID found in the gallery.
+    """
+
+    def __init__(self, counter_file, photos_dir, block_size=10, width=6):
+        self.counter_file = Path(counter_file)
+        self.lock_file = self.counter_file.with_suffix(".lock")
+        self.photos_dir = Path(photos_dir)
+        self.block_size = max(1, block_size)
+        self.width = width
+        self._lock = threading.Lock()
+        self._next = 1
+        self._limit = 0
+
+    def next_id(self):
+        """Return the next ID as a zero-padded string."""
+        with self._lock:
+            if self._next > self._limit:
+                self._reserve_block()
+            value = self._next
+            self._next += 1
+        return self.format(value)
+
+    def format(self, value):
+        """Zero-pad an ID so file names sort in capture order."""
+        return f"{value:0{self.width}d}"
+
+    def _reserve_block(self):
+        with FileLock(self.lock_file):
+            current = self._read_counter()
+            limit = current + self.block_size
+            write_atomic(self.counter_file, str(limit).encode())
+        self._next, self._limit = current + 1, limit
+
+    def _read_counter(self):
+        try:
+            return int(self.counter_file.read_text().strip())
+        except FileNotFoundError:
+            return self.scan_gallery()
+        except (OSError, ValueError):
+            backup = self.counter_file.with_name(f"{self.counter_file.name}.corrupt-{int(time.time())}")
+            try:
+                self.counter_file.replace(backup)
+            except OSError:
+                pass
+            recovered = self.scan_gallery()
+            print(f"Counter file corrupt, recovered from gallery: {recovered}")
+            return recovered
+
+    def scan_gallery(self):
+        """Return the highest photo or clip ID present in the gallery (0 if none)."""
+        highest = 0
+        if not self.photos_dir.exists():
+            return highest
+        for path in self.photos_dir.rglob("*_*"):
+            match = GALLERY_ID_PATTERN.match(path.name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+        return highest
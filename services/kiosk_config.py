@@ -0,0 +1,140 @@
+import json
+
+from config import KIOSK_CONFIG_FILE, MirrorSettings
+from services.fileio import write_atomic
+
+# MirrorSettings attributes chosen in the admin screen and restored on boot.
+PERSISTED_SETTINGS = (
+    "selected_camera",
+    "camera_mode",
+    "orientation",
+    "selected_screen",
+    "capture_mode",
+    "clip_format",
+    "output_preset",
+    "camera_filter",
+    "chroma_key",
+    "chroma_background",
+    "hands_free",
+    "auto_framing",
+    "pose_video_loops",
+    "countdown_seconds",
+    "clip_seconds",
+    "clip_fps",
+    "burst_size",
+    "kiosk_autostart",
+)
+
+
+def _coerce(name, value):
+    """Return value converted to the type of the MirrorSettings default, or raise ValueError."""
+    default = getattr(MirrorSettings, name)
+    if default is None:
+        if value is not None and not isinstance(value, dict):
+            raise ValueError(f"{name}: expected an object, got {value!r}")
+        return value
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"{name}: expected true/false, got {value!r}")
+        return value
+    if isinstance(default, (int, float)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name}: expected a number, got {value!r}")
+        if isinstance(default, int) and value != int(value):
+            raise ValueError(f"{name}: expected a whole number, got {value!r}")
+        return type(default)(value)
+    if isinstance(default, tuple):
+        if not isinstance(value, list):
+            raise ValueError(f"{name}: expected a list, got {value!r}")
+        return tuple(value)
+    if not isinstance(value, type(default)):
+        raise ValueError(f"{name}: expected {type(default).__name__}, got {value!r}")
+    return value
+
+
+class KioskConfig:
+    """Saves the booth setup to a JSON file and restores it on boot.
+
+    The file holds the PERSISTED_SETTINGS values plus the identity of the
+    selected camera, so a different device showing up at the same index is
+    noticed. It is written atomically; a missing, corrupt or partly invalid
+    file never stops the app, invalid entries are skipped and reported.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return self.path.exists()
+
+    def save(self, camera=None):
+        """Write the current settings; camera is the selected discovery entry."""
+        data = {
+            "settings": {name: getattr(MirrorSettings, name) for name in PERSISTED_SETTINGS},
+            "camera": {"key": camera.get("key"), "name": camera.get("name")} if camera else None,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.path, json.dumps(data, indent=2).encode())
+        except OSError as e:
+            print(f"Kiosk config: could not save {self.path}: {e}")
+            return False
+        print(f"Kiosk config saved to {self.path}")
+        return True
+
+    def load(self):
+        """Apply the saved settings to MirrorSettings; return the saved camera identity.
+
+        Returns None if there is no usable file.
+        """
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Kiosk config: ignoring unreadable {self.path}: {e}")
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("settings"), dict):
+            print(f"Kiosk config: ignoring {self.path}, no settings found")
+            return None
+
+        for name, value in data["settings"].items():
+            if name not in PERSISTED_SETTINGS:
+                continue
+            try:
+                setattr(MirrorSettings, name, _coerce(name, value))
+            except ValueError as e:
+                print(f"Kiosk config: skipping {e}")
+        camera = data.get("camera")
+        return camera if isinstance(camera, dict) else {}
+
+    def validate(self, saved_camera, cameras, monitor_count, identity=None):
+        """Return the reasons the saved setup cannot start unattended, empty if it can.
+
+        cameras is the cached discovery list (camera_discovery.cached()),
+        identity an optional index -> (key, name) function checking the
+        device currently at the saved index.
+        """
+        problems = []
+        index = MirrorSettings.selected_camera
+        camera = next((c for c in cameras if c.get("index") == index), None)
+        if camera is None:
+            problems.append(f"camera {index} is not in the device cache")
+        else:
+            key = (saved_camera or {}).get("key")
+            if key and camera.get("key") != key:
+                problems.append(f"camera {index} is now {camera.get('name')}, not {saved_camera.get('name')}")
+            elif key and identity is not None and identity(index)[0] != key:
+                problems.append(f"camera {index} is no longer {saved_camera.get('name')}")
+            mode = MirrorSettings.camera_mode
+            if mode is not None and mode not in (camera.get("modes") or []):
+                problems.append(f"camera {index} does not list mode {mode}")
+
+        if not 0 <= MirrorSettings.selected_screen < max(1, monitor_count):
+            problems.append(f"screen {MirrorSettings.selected_screen + 1} is not connected")
+        if MirrorSettings.orientation not in ("vertical", "horizontal"):
+            problems.append(f"unknown orientation {MirrorSettings.orientation!r}")
+        return problems
+
+
+kiosk_config = KioskConfig(KIOSK_CONFIG_FILE)
@@ -0,0 +1,125 @@
+import time
+
+from config import MirrorSettings
+
+
+class MediaManager:
+    """Controls video players across screens and measures CPU per screen.
+
+    Screens register their players; when the current screen changes, the
+    players of every other screen are paused (or unloaded, depending on
+    MirrorSettings.hidden_video_policy) so hidden videos stop decoding.
+    Players registered with keep_loaded are only paused and rewound, so
+    they restart instantly on the next visit.
+
+    CPU time is taken from time.process_time(), which covers every thread
+    of the process, and attributed to the screen that was current.
+    """
+
+    def __init__(self):
+        self.players = {}
+        self.cpu_by_screen = {}
+        self.current_screen = None
+        self._unloaded = set()
+        self._cpu_mark = time.process_time()
+        self._wall_mark = time.monotonic()
+
+    def register(self, screen_name, player, keep_loaded=False):
+        """Let the manager pause player while screen_name is hidden."""
+        self.players.setdefault(screen_name, []).append((player, keep_loaded))
+
+    def preload(self, player):
+        """Open the decoder now and park the player paused on its first frame."""
+        if player.loaded:
+            self.rewind(player)
+            return
+
+        def park(instance, loaded):
+            if loaded:
+                player.unbind(loaded=park)
+                if player.get_parent_window() is None:
+                    self.rewind(player)
+
+        player.bind(loaded=park)
+        player.state = 'play'
+
+    @staticmethod
+    def rewind(player):
+        """Pause player on its first frame without closing the decoder."""
+        player.state = 'pause'
+        if player.loaded:
+            player.seek(0)
+        player.eos = False
+
+    def restart(self, player):
+        """Play player again from the start."""
+        self.rewind(player)
+        player.state = 'play'
+
+    @staticmethod
+    def on_loop(player, callback):
+        """Call callback(player) each time a looping player wraps to the start.
+
+        Wraps are detected as a jump back of more than half the clip, so
+        small backwards corrections and rewinds while paused are ignored.
+        """
+        last = [0.0]
+
+        def check(instance, position):
+            previous, last[0] = last[0], position
+            if player.state == 'play' and player.duration > 0 and previous - position > player.duration / 2:
+                callback(player)
+
+        player.bind(position=check)
+
+    def on_screen_changed(self, screen_name):
+        """Pause the players of hidden screens and account CPU time."""
+        self._account()
+        self.current_screen = screen_name
+        for name, players in self.players.items():
+            for player, keep_loaded in players:
+                if name == screen_name:
+                    self._reload(player)
+                elif keep_loaded:
+                    if player.state == 'play':
+                        self.rewind(player)
+                elif player.state == 'play':
+                    if MirrorSettings.hidden_video_policy == "unload" and hasattr(player, "unload"):
+                        player.state = 'stop'
+                        player.unload()
+                        self._unloaded.add(player)
+                    else:
+                        player.state = 'pause'
+
+    def _reload(self, player):
+        """Reopen a player unloaded while its screen was hidden."""
+        if player in self._unloaded:
+            self._unloaded.discard(player)
+            source = player.source
+            player.source = ''
+            player.source = source
+
+    def _account(self):
+        cpu, wall = time.process_time(), time.monotonic()
+        if self.current_screen is not None:
+            cpu_used, wall_used = cpu - self._cpu_mark, wall - self._wall_mark
+            totals = self.cpu_by_screen.setdefault(self.current_screen, [0.0, 0.0])
+            totals[0] += cpu_used
+            totals[1] += wall_used
+            if wall_used > 0:
+                print(f"Screen '{self.current_screen}': {100 * cpu_used / wall_used:.0f}% CPU over {wall_used:.1f}s")
+        self._cpu_mark, self._wall_mark = cpu, wall
+
+    def cpu_report(self):
+        """Print average CPU use per screen since startup.
+
+        100% is one full core.
+        """
+        self._account()
+        print("CPU per screen:")
+        for name, (cpu, wall) in sorted(self.cpu_by_screen.items()):
+            if wall > 0:
+                print(f"  {name:<12} {100 * cpu / wall:5.0f}% CPU  ({wall:.0f}s shown)")
+
+
+media_manager = MediaManager()
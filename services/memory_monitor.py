@@ -0,0 +1,111 @@
+import gc
+import os
+import sys
+import time
+
+
+def rss_bytes():
+    """Return the resident set size of this process in bytes (0 if unknown)."""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        if sys.platform.startswith("win"):
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+        import resource
+        # Peak, not current, on macOS; still shows a leak as steady growth.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except Exception:
+        return 0
+
+
+def limit_kivy_caches(image_limit, texture_limit, timeout=60):
+    """Bound Kivy's own image and texture caches by entry count.
+
+    Kivy registers both without a limit; entries only expire after the
+    timeout, so a burst of distinct images could otherwise pile up.
+    """
+    from kivy.cache import Cache
+
+    Cache.register('kv.image', limit=image_limit, timeout=timeout)
+    Cache.register('kv.texture', limit=texture_limit, timeout=timeout)
+
+
+class KivyCacheOccupancy:
+    """Occupancy of one Kivy Cache category, estimating texture bytes."""
+
+    def __init__(self, category):
+        self.category = category
+
+    @property
+    def occupancy(self):
+        from kivy.cache import Cache
+
+        entries = list(Cache._objects.get(self.category, {}).values())
+        size = 0
+        for entry in entries:
+            texture = getattr(entry["object"], "texture", entry["object"])
+            width, height = getattr(texture, "size", (0, 0))
+            size += width * height * 4
+        return len(entries), size
+
+
+class MemoryMonitor:
+    """Reports process memory and the occupancy of the app's caches.
+
+    Caches register with an object exposing occupancy -> (entries, bytes)
+    and their byte cap, so a report shows how full each one is next to
+    the process RSS. report() is scheduled periodically by the app.
+    """
+
+    def __init__(self):
+        self.caches = {}
+        self.started = time.monotonic()
+        self.first_rss = None
+
+    def register(self, name, cache, cap_bytes=None):
+        """Include cache (anything with an occupancy property) in reports."""
+        self.caches[name] = (cache, cap_bytes)
+
+    def snapshot(self):
+        """Return a dict with rss, gc object count and per-cache occupancy."""
+        caches = {}
+        for name, (cache, cap) in self.caches.items():
+            entries, size = cache.occupancy
+            caches[name] = {"entries": entries, "bytes": size, "cap_bytes": cap}
+        return {"rss": rss_bytes(), "gc_objects": len(gc.get_objects()), "caches": caches}
+
+    def report(self, *args):
+        """Print one line per cache plus RSS growth since the first report."""
+        snapshot = self.snapshot()
+        rss = snapshot["rss"]
+        if self.first_rss is None:
+            self.first_rss = rss
+        hours = (time.monotonic() - self.started) / 3600
+        print(
+            f"Memory: RSS {rss / 2**20:.0f} MB ({(rss - self.first_rss) / 2**20:+.0f} MB in {hours:.1f} h), "
+            f"{snapshot['gc_objects']} Python objects"
+        )
+        for name, cache in snapshot["caches"].items():
+            cap = f"/{cache['cap_bytes'] / 2**20:.0f}" if cache["cap_bytes"] else ""
+            print(f"  {name:<16} {cache['entries']:>5} entries {cache['bytes'] / 2**20:>7.1f}{cap} MB")
+        return snapshot
+
+
+memory_monitor = MemoryMonitor()
@@ -0,0 +1,109 @@
+import itertools
+import queue
+import threading
+import time
+
+from kivy.clock import Clock
+
+from config import MirrorSettings
+from services.fileio import write_atomic
+
+
+class PhotoWriter:
+    """Encodes and saves photos on a background thread.
+
+    Screens submit a target path plus an encode callable that returns the
+    file bytes; encoding and disk I/O happen on the worker so the UI never
+    waits on them. The job queue is bounded: when it is full, submit() fails
+    at once rather than blocking the UI thread. Callbacks are kept per job,
+    so several jobs for the same path each get their own result.
+    Completion callbacks are delivered on the Kivy main thread via Clock.
+    """
+
+    def __init__(self, max_pending=8):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._job_ids = itertools.count()
+        self._thread = None
+
+    def submit(self, path, encode, on_done=None, after_write=None):
+        """Queue an encode job; return False, without waiting, if the queue is full.
+
+        after_write(path, data) runs on the worker once the file is in place;
+        its errors are logged and do not count as a failed write.
+        """
+        path = str(path)
+        self._ensure_worker()
+
+        with self._lock:
+            job = next(self._job_ids)
+            self._pending[job] = (path, [on_done] if on_done is not None else [])
+
+        try:
+            self._queue.put_nowait((job, path, encode, after_write))
+        except queue.Full:
+            with self._lock:
+                _, callbacks = self._pending.pop(job)
+            print(f"Photo writer busy, dropped: {path}")
+            self._dispatch(callbacks, path, RuntimeError("writer queue full"))
+            return False
+        return True
+
+    def is_pending(self, path):
+        """True while a job for path has not finished yet."""
+        path = str(path)
+        with self._lock:
+            return any(job_path == path for job_path, _ in self._pending.values())
+
+    def when_done(self, path, callback):
+        """Call callback(path, error) once the newest job for path is written (or right away)."""
+        path = str(path)
+        with self._lock:
+            jobs = [job for job, (job_path, _) in self._pending.items() if job_path == path]
+            if jobs:
+                self._pending[max(jobs)][1].append(callback)
+                return
+        self._dispatch([callback], path, None)
+
+    def flush(self, timeout=10.0):
+        """Wait until every queued job has been written, up to timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="photo-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Worker loop: encode, write atomically and report completion."""
+        while True:
+            job, path, encode, after_write = self._queue.get()
+            error = None
+            try:
+                data = encode()
+                write_atomic(path, data)
+                print(f"Photo written: {path}")
+            except Exception as e:
+                error = e
+                print(f"Error writing photo {path}: {e}")
+            # Bookkeeping failures are logged only: the photo itself is saved.
+            if error is None and after_write is not None:
+                try:
+                    after_write(path, data)
+                except Exception as e:
+                    print(f"Error after writing photo {path}: {e}")
+            with self._lock:
+                _, callbacks = self._pending.pop(job)
+            self._dispatch(callbacks, path, error)
+            self._queue.task_done()
+
+    @staticmethod
+    def _dispatch(callbacks, path, error):
+        for callback in callbacks:
+            Clock.schedule_once(lambda dt, cb=callback: cb(path, error), 0)
+
+
+photo_writer = PhotoWriter(MirrorSettings.writer_queue_size)
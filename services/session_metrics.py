@@ -0,0 +1,220 @@
+import gc
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from config import METRICS_DIR, MirrorSettings
+from services.fileio import write_atomic
+
+# Histogram bucket upper bounds, in seconds.
+FRAME_BUCKETS = (0.008, 0.017, 0.025, 0.033, 0.05, 0.1, 0.25, 0.5)
+GC_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+def quantile(values, q):
+    """Nearest-rank quantile of a sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yield (upper bound label, cumulative count)."""
+        running = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            running += count
+            yield bound, running
+
+    def prometheus(self, name):
+        lines = [f"# TYPE {name} histogram"]
+        for bound, running in self.cumulative():
+            lines.append(f'{name}_bucket{{le="{bound}"}} {running}')
+        lines.append(f"{name}_sum {self.total:.6f}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class SessionMetrics:
+    """Times every stage of a guest session.
+
+    A session starts when the guest touches the start screen. Stages are
+    timed with begin()/end() pairs, which may run on different threads,
+    or recorded directly with record(). Each span is written as one JSON
+    line (session id, stage, offset from session start, duration) to a
+    rotating log. The last durations per stage are kept in memory for the
+    p50/p95 overlay and a Prometheus textfile snapshot, which is rewritten
+    after every session; the snapshot's _sum and _count come from running
+    totals, so they only ever grow.
+    """
+
+    def __init__(self, metrics_dir, window=500):
+        self.metrics_dir = metrics_dir
+        self.window = window
+        self.session_id = None
+        self.session_started = 0.0
+        self.sessions = 0
+        self.durations = {}
+        self.totals = {}
+        self.frame_times = Histogram(FRAME_BUCKETS)
+        self.gc_pauses = Histogram(GC_BUCKETS)
+        self._open = {}
+        self._lock = threading.Lock()
+        self._logger = None
+        self._gc_started = None
+
+    def install(self):
+        """Open the span log and start measuring garbage collector pauses."""
+        if self._logger is not None:
+            return
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            self.metrics_dir / "sessions.jsonl",
+            maxBytes=MirrorSettings.metrics_log_max_mb * 1024 * 1024,
+            backupCount=MirrorSettings.metrics_log_backups,
+            encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger("freemagicmirror.sessions")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._logger = logger
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            self.gc_pauses.observe(time.perf_counter() - self._gc_started)
+            self._gc_started = None
+
+    def start_session(self):
+        """Begin a new guest session and return its id."""
+        with self._lock:
+            self.session_id = uuid.uuid4().hex[:12]
+            self.session_started = time.monotonic()
+            # Spans that never ended (e.g. a preview that was off) expire.
+            stale = self.session_started - 600
+            self._open = {key: started for key, started in self._open.items() if started > stale}
+        return self.session_id
+
+    def begin(self, stage, session=None):
+        """Mark the start of stage in session (default: the current one)."""
+        session = session or self.session_id
+        with self._lock:
+            self._open[(session, stage)] = time.monotonic()
+
+    def end(self, stage, session=None):
+        """Close a span opened with begin(); return its duration or None."""
+        session = session or self.session_id
+        with self._lock:
+            started = self._open.pop((session, stage), None)
+        if started is None:
+            return None
+        seconds = time.monotonic() - started
+        self.record(stage, seconds, session, started)
+        return seconds
+
+    def record(self, stage, seconds, session=None, started=None):
+        """Store a finished span and append it to the log."""
+        session = session or self.session_id
+        started = started if started is not None else time.monotonic() - seconds
+        offset_ms = None
+        if session is not None and session == self.session_id:
+            offset_ms = round((started - self.session_started) * 1000, 1)
+        with self._lock:
+            self.durations.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+            totals = self.totals.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+        if self._logger is not None:
+            self._logger.info(json.dumps({
+                "time": round(time.time(), 3),
+                "session": session,
+                "stage": stage,
+                "offset_ms": offset_ms,
+                "duration_ms": round(seconds * 1000, 1),
+            }))
+
+    def timed(self, stage, fn, session=None):
+        """Run fn(), record its duration as stage and return its result."""
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            self.record(stage, time.monotonic() - started, session, started)
+
+    def end_session(self):
+        """Record the whole session and refresh the Prometheus snapshot."""
+        if self.session_id is None:
+            return
+        self.record("session", time.monotonic() - self.session_started, started=self.session_started)
+        with self._lock:
+            self.sessions += 1
+            self.session_id = None
+        self.write_prometheus()
+
+    def frame(self, dt):
+        """Clock callback: observe the time between two UI frames."""
+        self.frame_times.observe(dt)
+
+    def stage_quantiles(self):
+        """Return {stage: (p50, p95, count)} in seconds."""
+        with self._lock:
+            snapshot = {stage: sorted(values) for stage, values in self.durations.items()}
+        return {
+            stage: (quantile(values, 0.5), quantile(values, 0.95), len(values))
+            for stage, values in snapshot.items()
+        }
+
+    def prometheus(self):
+        """Return the metrics in Prometheus text exposition format."""
+        lines = [
+            "# TYPE fmm_sessions_total counter",
+            f"fmm_sessions_total {self.sessions}",
+            "# TYPE fmm_stage_duration_seconds summary",
+        ]
+        with self._lock:
+            snapshot = {stage: (sorted(values), *self.totals[stage]) for stage, values in self.durations.items()}
+        for stage, (ordered, total, count) in sorted(snapshot.items()):
+            for q in (0.5, 0.95):
+                lines.append(f'fmm_stage_duration_seconds{{stage="{stage}",quantile="{q}"}} {quantile(ordered, q):.6f}')
+            lines.append(f'fmm_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'fmm_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+        lines += self.frame_times.prometheus("fmm_frame_time_seconds")
+        lines += self.gc_pauses.prometheus("fmm_gc_pause_seconds")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        """Atomically rewrite the textfile-collector snapshot."""
+        try:
+            self.metrics_dir.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.metrics_dir / "freemagicmirror.prom", self.prometheus().encode())
+        except OSError as e:
+            print(f"Could not write metrics snapshot: {e}")
+
+
+session_metrics = SessionMetrics(METRICS_DIR)
@@ -0,0 +1,38 @@
+import time
+
+
+class StartupTrace:
+    """Records how long each startup phase takes, from process start.
+
+    main.py imports this module first, so the clock starts before Kivy and
+    the screens are imported. Call mark() at the end of each phase and
+    report() once the first frame has been drawn.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase):
+        """Record that phase has just finished."""
+        self.phases.append((phase, time.perf_counter()))
+
+    def elapsed(self):
+        """Seconds since the trace started."""
+        return time.perf_counter() - self.started
+
+    def report(self):
+        """Print each phase's duration and the total time to first frame."""
+        if self.reported:
+            return
+        self.reported = True
+        previous = self.started
+        print("Startup trace:")
+        for phase, at in self.phases:
+            print(f"  {phase:<24} {(at - previous) * 1000:7.0f} ms")
+            previous = at
+        print(f"  {'total':<24} {(previous - self.started) * 1000:7.0f} ms")
+
+
+startup_trace = StartupTrace()
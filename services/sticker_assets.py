@@ -0,0 +1,208 @@
+import hashlib
+import json
+import math
+from collections import OrderedDict
+from pathlib import Path
+
+import cv2
+import numpy as np
+from kivy.core.image import Image as CoreImage
+
+from config import CACHE_DIR, MirrorSettings
+from services.compositor import read_bgra
+from services.fileio import write_atomic
+
+ATLAS_NAME = "stickers"
+ATLAS_PAGE_SIZE = 2048
+
+
+def file_hash(path):
+    """Return the SHA-1 of a file's contents."""
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def make_thumbnail(path, size):
+    """Return a BGRA thumbnail no larger than size x size."""
+    image = read_bgra(path)
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    if scale < 1:
+        new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+    return image
+
+
+class StickerAtlas:
+    """Kivy atlas of sticker tray thumbnails, cached on disk between runs.
+
+    A manifest records each sticker's mtime and content hash, and the mtime
+    of stickers that could not be read; the atlas is only rebuilt when
+    stickers are added, removed or their contents change.
+    Thumbnails are then loaded by Kivy as atlas:// regions of a few pages
+    instead of one full-size texture per sticker.
+    """
+
+    def __init__(self, cache_dir, thumb_size=128):
+        self.cache_dir = Path(cache_dir)
+        self.thumb_size = thumb_size
+        self.atlas_path = self.cache_dir / f"{ATLAS_NAME}.atlas"
+        self.manifest_path = self.cache_dir / f"{ATLAS_NAME}.manifest.json"
+        self.ids = {}
+
+    def url(self, sticker_path):
+        """Return the atlas:// url of a sticker thumbnail, or its file path."""
+        atlas_id = self.ids.get(str(sticker_path))
+        if atlas_id is None:
+            return str(sticker_path)
+        return f"atlas://{self.atlas_path.with_suffix('').as_posix()}/{atlas_id}"
+
+    def ensure(self, sticker_paths):
+        """Load the cached atlas, rebuilding it if any sticker changed."""
+        sticker_paths = sorted(str(p) for p in sticker_paths)
+        manifest = self._load_manifest()
+
+        current, touched = self._check_manifest(manifest, sticker_paths)
+        if current:
+            self.ids = {path: entry["id"] for path, entry in manifest["files"].items()}
+            if touched:
+                write_atomic(self.manifest_path, json.dumps(manifest).encode())
+            return False
+
+        self.build(sticker_paths)
+        return True
+
+    def _load_manifest(self):
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _check_manifest(self, manifest, sticker_paths):
+        """Return (current, touched): touched means only mtimes changed."""
+        if not manifest or manifest.get("thumb_size") != self.thumb_size:
+            return False, False
+        skipped = manifest.get("skipped", {})
+        if not self.atlas_path.exists() or sorted([*manifest["files"], *skipped]) != sticker_paths:
+            return False, False
+        for path, mtime in skipped.items():
+            try:
+                if Path(path).stat().st_mtime_ns != mtime:
+                    return False, False
+            except OSError:
+                return False, False
+
+        touched = False
+        for path, entry in manifest["files"].items():
+            try:
+                mtime = Path(path).stat().st_mtime_ns
+            except OSError:
+                return False, False
+            if mtime == entry["mtime"]:
+                continue
+            if file_hash(path) != entry["hash"]:
+                return False, False
+            entry["mtime"] = mtime
+            touched = True
+        return True, touched
+
+    def build(self, sticker_paths):
+        """Pack thumbnails into atlas pages and write the Kivy .atlas file."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cell = self.thumb_size + 2
+        per_row = max(1, ATLAS_PAGE_SIZE // cell)
+        per_page = per_row * per_row
+
+        atlas = {}
+        files = {}
+        skipped = {}
+        self.ids = {}
+        for page_index in range(math.ceil(len(sticker_paths) / per_page)):
+            chunk = sticker_paths[page_index * per_page:(page_index + 1) * per_page]
+            rows = math.ceil(len(chunk) / per_row)
+            page_h, page_w = rows * cell, min(len(chunk), per_row) * cell
+            page = np.zeros((page_h, page_w, 4), dtype=np.uint8)
+            regions = {}
+
+            for i, path in enumerate(chunk):
+                try:
+                    thumb = make_thumbnail(path, self.thumb_size)
+                except FileNotFoundError:
+                    print(f"Skipping unreadable sticker: {path}")
+                    # Remembered so the atlas is not rebuilt for it on every start.
+                    try:
+                        skipped[path] = Path(path).stat().st_mtime_ns
+                    except OSError:
+                        pass
+                    continue
+                height, width = thumb.shape[:2]
+                x = (i % per_row) * cell + 1 + (self.thumb_size - width) // 2
+                top = (i // per_row) * cell + 1 + (self.thumb_size - height) // 2
+                page[top:top + height, x:x + width] = thumb
+
+                atlas_id = f"s{page_index}_{i}"
+                regions[atlas_id] = [x, page_h - top - height, width, height]
+                files[path] = {"mtime": Path(path).stat().st_mtime_ns, "hash": file_hash(path), "id": atlas_id}
+                self.ids[path] = atlas_id
+
+            page_name = f"{ATLAS_NAME}-{page_index}.png"
+            ok, buffer = cv2.imencode(".png", page)
+            if ok:
+                write_atomic(self.cache_dir / page_name, buffer.tobytes())
+            atlas[page_name] = regions
+
+        write_atomic(self.atlas_path, json.dumps(atlas).encode())
+        manifest = {"thumb_size": self.thumb_size, "files": files, "skipped": skipped}
+        write_atomic(self.manifest_path, json.dumps(manifest).encode())
+        print(f"Sticker atlas rebuilt: {len(files)} stickers, {len(atlas)} page(s)")
+
+
+class TextureLRUCache:
+    """Size-bounded LRU cache of full-resolution textures.
+
+    All placements of the same sticker share one texture. When the cache
+    exceeds max_bytes the least recently used textures are dropped; widgets
+    still showing them keep their own reference until removed.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._textures = OrderedDict()
+        self._bytes = 0
+
+    def get(self, path):
+        """Return the texture for path, loading it on first use."""
+        key = str(path)
+        texture = self._textures.get(key)
+        if texture is not None:
+            self._textures.move_to_end(key)
+            return texture
+
+        texture = CoreImage(key, nocache=True).texture
+        self._textures[key] = texture
+        self._bytes += self._texture_bytes(texture)
+        self._evict()
+        return texture
+
+    def clear(self):
+        """Drop every cached texture."""
+        self._textures.clear()
+        self._bytes = 0
+
+    @property
+    def occupancy(self):
+        """Return (texture count, estimated bytes)."""
+        return len(self._textures), self._bytes
+
+    @staticmethod
+    def _texture_bytes(texture):
+        width, height = texture.size
+        return width * height * 4
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._textures) > 1:
+            _, texture = self._textures.popitem(last=False)
+            self._bytes -= self._texture_bytes(texture)
+
+
+sticker_atlas = StickerAtlas(CACHE_DIR, MirrorSettings.sticker_thumb_size)
+sticker_textures = TextureLRUCache(MirrorSettings.sticker_cache_mb * 1024 * 1024)